@@ -1,19 +1,49 @@
 import json
-from typing import Generator
+from functools import partial
+from typing import Dict, Generator, Optional
 from together import Together
 from prompts import *
 from tools import ToolRegistry
 from restaurant_db import RestaurantDB
+from router import IntentRouter, Route
 import os
 import re
+import time
+from dataclasses import dataclass
+
+MODEL = "meta-llama/Meta-Llama-3.1-8B-Instruct-Turbo"
+
+
+@dataclass
+class StageMetrics:
+    # totals per LLM stage ("intent", "extraction", "combined", ...) or per turn path
+    calls: int = 0
+    seconds: float = 0.0
+    tokens: int = 0
+
+    @property
+    def avg_seconds(self) -> float:
+        return self.seconds / self.calls if self.calls else 0.0
+
+    @property
+    def avg_tokens(self) -> float:
+        return self.tokens / self.calls if self.calls else 0.0
+
 
 class ReservationAgent:
     def __init__(self):
         # self.client = Together(api_key=os.getenv("TOGETHER_API_KEY"))
         self.tools = ToolRegistry()
         self.db = RestaurantDB()
+        # settles obvious commands locally; see self.router.metrics for its hit rate
+        self.router = IntentRouter(self.db.restaurants)
         self.register_tools()
         self.conversation_history = []
+        # one structured intent+parameters call per turn; COMBINED_EXTRACTION=0 restores the two-step path
+        self.combined_extraction = os.getenv("COMBINED_EXTRACTION", "1") != "0"
+        # latency and tokens per stage; "understanding:<path>" compares the paths per turn
+        self.metrics: Dict[str, StageMetrics] = {}
+        self._llm_tokens = 0
     
     def register_tools(self):
         # available tools
@@ -26,9 +56,17 @@ class ReservationAgent:
                 "party_size": {"type": "integer", "description": "Number of people in the party"},
                 "date": {"type": "string", "description": "Date of reservation in YYYY-MM-DD format"},
                 "time": {"type": "string", "description": "Time of reservation in HH:MM format"},
-                "amenities": {"type": "string", "description": "Desired amenities (outdoor, bar, etc.)"}
+                "date_to": {"type": "string", "description": "Last date of a range (e.g. this weekend) in YYYY-MM-DD format; any day from date to date_to counts"},
+                "amenities": {"type": "string", "description": "Desired amenities (outdoor, bar, etc.)"},
+                "open_now": {"type": "boolean", "description": "Only restaurants open right now"},
+                "open_at": {"type": "string", "description": "Only restaurants open at this moment, YYYY-MM-DD HH:MM"},
+                "max_price": {"type": "integer", "description": "Budget in rupees; the restaurant's cheapest price must fit it"},
+                "min_rating": {"type": "number", "description": "Minimum rating out of 5"},
+                "sort_by": {"type": "string", "description": "Rank results by rating, price or availability"},
+                "limit": {"type": "integer", "description": "Maximum number of results (default 10)"}
             },
-            function=self.db.find_restaurants
+            # the LLM only ever sees the top candidates, not the whole catalog
+            function=partial(self.db.find_restaurants, limit=10)
         )
         
         self.tools.register_tool(
@@ -64,6 +102,59 @@ class ReservationAgent:
             function=self.db.cancel_reservation
         )
 
+        self.tools.register_tool(
+            name="get_availability",
+            description="List the free time slots of one restaurant for a whole day",
+            parameters={
+                "restaurant_id": {"type": "integer", "description": "ID of the restaurant"},
+                "date": {"type": "string", "description": "Date to check in YYYY-MM-DD format"},
+                "slot_minutes": {"type": "integer", "description": "Length of each time slot in minutes (default 30)"}
+            },
+            function=self.db.get_availability
+        )
+
+        self.tools.register_tool(
+            name="make_reservations_bulk",
+            description="Make several reservations at once (group events, imports); all are booked or none are",
+            parameters={
+                "reservations": {"type": "array", "description": "List of reservations, each with restaurant_id, name, party_size, date (YYYY-MM-DD), time (HH:MM) and optional special_requests"}
+            },
+            function=self.db.make_reservations_bulk
+        )
+
+        self.tools.register_tool(
+            name="cancel_reservations_bulk",
+            description="Cancel several existing reservations at once; all are canceled or none are",
+            parameters={
+                "reservation_ids": {"type": "array", "description": "IDs of the reservations to cancel"}
+            },
+            function=self.db.cancel_reservations_bulk
+        )
+
+        self.tools.register_tool(
+            name="find_reservations",
+            description="List a guest's upcoming reservations by the name they were made under",
+            parameters={
+                "name": {"type": "string", "description": "Name the reservations were made under"},
+                "date_from": {"type": "string", "description": "Earliest date in YYYY-MM-DD format"},
+                "date_to": {"type": "string", "description": "Latest date in YYYY-MM-DD format"},
+                "include_past": {"type": "boolean", "description": "Also include past reservations"}
+            },
+            function=self.db.find_reservations
+        )
+
+        self.tools.register_tool(
+            name="reservation_history",
+            description="Look up past reservations (dates before today) by guest name, restaurant or date range",
+            parameters={
+                "name": {"type": "string", "description": "Name the reservation was made under"},
+                "restaurant_id": {"type": "integer", "description": "ID of the restaurant"},
+                "date_from": {"type": "string", "description": "Earliest date in YYYY-MM-DD format"},
+                "date_to": {"type": "string", "description": "Latest date in YYYY-MM-DD format"}
+            },
+            function=self.db.reservation_history
+        )
+
     
     def process_message(self, user_input: str) -> Generator[str, None, None]:
 
@@ -80,6 +171,14 @@ class ReservationAgent:
             return
 
         self.conversation_history.append({"role": "user", "content": user_input})
+
+        # obvious commands skip the intent, extraction and response LLM calls
+        route = self.router.route(user_input)
+        if route:
+            reply = self._local_reply(route)
+            self.conversation_history.append({"role": "assistant", "content": reply})
+            yield reply
+            return
         
         # Get restaurant list for the prompt
         restaurants = self.db.find_restaurants()
@@ -88,76 +187,80 @@ class ReservationAgent:
             for r in restaurants
         )
                 
-        # Determine intent
-        intent_prompt = INTENT_PROMPT.format(
-            conversation_history=json.dumps(self.conversation_history[-5:], indent=2),
-            tools_description=self.tools.get_tools_description(),
-            restaurants_list=restaurants_list
-        )
-        
-        intent_response = self.client.chat.completions.create(
-            model="meta-llama/Meta-Llama-3.1-8B-Instruct-Turbo",
-            messages=[{"role": "user", "content": intent_prompt}],
-            temperature=0.2,
-            max_tokens=500
-        )
-        
-        intent_data = self._parse_response(intent_response.choices[0].message.content)
-        if "error" in intent_data:
-            yield ("Error determining intent, Please enter your request again or try rephrasing it.")
-            return
-        
-        # Extract parameters if needed
-        if intent_data.get("needs_parameters"):
-            extraction_prompt = PARAMETER_EXTRACTION_PROMPT.format(
-                user_input=user_input,
-                intent=intent_data["intent"],
-                parameters=intent_data.get("parameters", ""),
+        # Determine intent and parameters: one structured call, or the two-step path
+        # when combined mode is off or its answer does not validate
+        started = time.perf_counter()
+        tokens_before = self._tokens_used()
+        intent_data = self._combined_intent(user_input, restaurants_list) if self.combined_extraction else None
+        path = "combined"
+        if intent_data is None:
+            path = "two_step" if not self.combined_extraction else "combined_fallback"
+            intent_prompt = INTENT_PROMPT.format(
+                conversation_history=json.dumps(self.conversation_history[-5:], indent=2),
+                tools_description=self.tools.get_tools_description(),
                 restaurants_list=restaurants_list
             )
-            
-            extraction_response = self.client.chat.completions.create(
-                model="meta-llama/Meta-Llama-3.1-8B-Instruct-Turbo",
-                messages=[{"role": "user", "content": extraction_prompt}],
-                temperature=0.2,
-                max_tokens=500
-            )
-            
-            # Parse extracted parameters
-            extracted_params = self._parse_response(extraction_response.choices[0].message.content)
 
-            # Resolve restaurant name to ID if needed
-            if intent_data.get("intent") == "make_reservation":
-                if "restaurant_name" in extracted_params and "restaurant_id" not in extracted_params:
+            intent_response = self._complete("intent", intent_prompt, temperature=0.2, max_tokens=500)
+
+            intent_data = self._parse_response(intent_response.choices[0].message.content)
+            if "error" in intent_data:
+                yield ("Error determining intent, Please enter your request again or try rephrasing it.")
+                return
+
+            # Extract parameters if needed
+            if intent_data.get("needs_parameters"):
+                extraction_prompt = PARAMETER_EXTRACTION_PROMPT.format(
+                    user_input=user_input,
+                    intent=intent_data["intent"],
+                    parameters=intent_data.get("parameters", ""),
+                    restaurants_list=restaurants_list
+                )
+
+                extraction_response = self._complete("extraction", extraction_prompt, temperature=0.2, max_tokens=500)
+
+                # Parse extracted parameters
+                extracted_params = self._parse_response(extraction_response.choices[0].message.content)
+                if intent_data.get("intent") == "make_reservation":
+                    intent_data["parameters"] = extracted_params
+        self._record(f"understanding:{path}", time.perf_counter() - started, self._tokens_used() - tokens_before)
+        # the two-step intent answer may give parameters as a string or list; treat that as none
+        if not isinstance(intent_data.get("parameters"), dict):
+            intent_data["parameters"] = {}
+
+        # Resolve restaurant name to ID if needed
+        if intent_data.get("intent") == "make_reservation":
+            extracted_params = intent_data["parameters"]
+            if "restaurant_name" in extracted_params and "restaurant_id" not in extracted_params:
+                match = self.db.resolve_restaurant_name(extracted_params["restaurant_name"])
+                if match and match["exact"]:
+                    extracted_params["restaurant_id"] = match["id"]
+                elif match:
+                    yield self._did_you_mean(extracted_params["restaurant_name"], match)
+                    return
+                else:
                     restaurant_matches = self.db.find_restaurants()
-                    match = next(
-                        (r for r in restaurant_matches if r["name"].lower() == extracted_params["restaurant_name"].lower()),
-                        None
+                    formatted_restaurants = "\n".join(
+                        f"- **{r['name']}** ({r['cuisine']}, {r['location']}) — "
+                        f"Capacity: {r['capacity']}, Rating: {r['rating']}, Price: {r.get('price_range', 'N/A') or 'N/A'}"
+                        for r in restaurant_matches
                     )
-                    if match:
-                        extracted_params["restaurant_id"] = match["id"]
-                    else:
-                        formatted_restaurants = "\n".join(
-                            f"- **{r['name']}** ({r['cuisine']}, {r['location']}) — "
-                            f"Capacity: {r['capacity']}, Rating: {r['rating']}, Price: {r.get('price_range', 'N/A') or 'N/A'}"
-                            for r in restaurant_matches
-                        )
-                        yield f""" Sorry, we couldn't find any restaurant named **{extracted_params['restaurant_name']}** in our system.
+                    yield f""" Sorry, we couldn't find any restaurant named **{extracted_params['restaurant_name']}** in our system.
 
-                            Here are some restaurants you can choose from:
+                        Here are some restaurants you can choose from:
 
-                            {formatted_restaurants}
+                        {formatted_restaurants}
 
-                            Please let me know which one you'd like to book."""
-                        return
-
-                intent_data["parameters"] = extracted_params
+                        Please let me know which one you'd like to book."""
+                    return
+            # make_reservation takes the resolved id only
+            extracted_params.pop("restaurant_name", None)
         
         # Execute tool if applicable
         tool_response = None
         if intent_data.get("tool_to_use"):
             tool_name = intent_data["tool_to_use"]
-            tool_params = intent_data.get("parameters", {})
+            tool_params = intent_data["parameters"]
 
             # Add validation before executing the tool
             if tool_name == "make_reservation":
@@ -170,18 +273,20 @@ class ReservationAgent:
                     yield f"To complete your reservation, please provide - Restaurant Name, Your name, Party Size, Date, and Time. Don't forget to give your - {', '.join(missing_fields)}. Make sure the restaurant comes under our list of restaurants."
                     return
         
-            if "restaurant_id" in tool_params and isinstance(tool_params["restaurant_id"], str):
-                # Avoiding hallucination
+            if tool_name != "make_reservation" and "restaurant_id" in tool_params and isinstance(tool_params["restaurant_id"], str):
+                # Avoiding hallucination; make_reservation resolves a name given as the id below
                 tool_params["restaurant_name"] = tool_params.pop("restaurant_id")
 
 
             if tool_name == "make_reservation":
                 if "restaurant_id" in tool_params and isinstance(tool_params["restaurant_id"], str):
                     restaurant_name = tool_params.pop("restaurant_id")
-                    matches = self.db.find_restaurants()
-                    match = next((r for r in matches if r["name"].lower() == restaurant_name.lower()), None)
-                    if match:
+                    match = self.db.resolve_restaurant_name(restaurant_name)
+                    if match and match["exact"]:
                         tool_params["restaurant_id"] = match["id"]
+                    elif match:
+                        yield self._did_you_mean(restaurant_name, match)
+                        return
                     else:
                         yield f"Sorry, I couldn't find a restaurant named '{restaurant_name}'"
                         return
@@ -193,14 +298,11 @@ class ReservationAgent:
 
             if isinstance(tool_response, dict) and not tool_response.get("success", True):
                 error_prompt = ERROR_PROMPT.format(
-                    error_message=tool_response.get("error", "An unknown error occurred")
-                )
-                error_response = self.client.chat.completions.create(
-                    model="meta-llama/Meta-Llama-3.1-8B-Instruct-Turbo",
-                    messages=[{"role": "user", "content": error_prompt}],
-                    temperature=0.7,
-                    max_tokens=500
+                    error_message=tool_response.get("error", "An unknown error occurred"),
+                    suggestions=self._format_suggestions(tool_response) or "None",
+                    alternatives=self._format_alternatives(tool_response) or "None"
                 )
+                error_response = self._complete("error", error_prompt, temperature=0.7, max_tokens=500)
                 error_text = error_response.choices[0].message.content
                 self.conversation_history.append({"role": "assistant", "content": error_text})
                 yield error_text
@@ -216,7 +318,7 @@ class ReservationAgent:
         
         full_response = ""
         stream = self.client.chat.completions.create(
-            model="meta-llama/Meta-Llama-3.1-8B-Instruct-Turbo",
+            model=MODEL,
             messages=[{"role": "user", "content": response_prompt}],
             temperature=0.7,
             max_tokens=1000,
@@ -226,11 +328,147 @@ class ReservationAgent:
         for chunk in stream:
             content = chunk.choices[0].delta.content
             if content:
+                if not full_response:
+                    # time to first token for the whole turn
+                    self._record("first_token", time.perf_counter() - started, 0)
                 full_response += content
                 yield content
         
         self.conversation_history.append({"role": "assistant", "content": full_response})
     
+    def _complete(self, stage: str, prompt: str, temperature: float, max_tokens: int, **kwargs):
+        started = time.perf_counter()
+        response = self.client.chat.completions.create(
+            model=MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **kwargs
+        )
+        usage = getattr(response, "usage", None)
+        tokens = (getattr(usage, "prompt_tokens", 0) or 0) + (getattr(usage, "completion_tokens", 0) or 0)
+        self._record(stage, time.perf_counter() - started, tokens)
+        self._llm_tokens += tokens
+        return response
+
+    def _tokens_used(self) -> int:
+        return self._llm_tokens
+
+    def _record(self, stage: str, seconds: float, tokens: int):
+        stats = self.metrics.setdefault(stage, StageMetrics())
+        stats.calls += 1
+        stats.seconds += seconds
+        stats.tokens += tokens
+
+    def _combined_intent(self, user_input: str, restaurants_list: str) -> Optional[dict]:
+        # intent, tool and parameters from one schema-constrained call; None sends
+        # the turn down the two-step path
+        prompt = COMBINED_INTENT_PROMPT.format(
+            conversation_history=json.dumps(self.conversation_history[-5:], indent=2),
+            tools_description=self.tools.get_tools_description(),
+            restaurants_list=restaurants_list,
+            user_input=user_input
+        )
+        try:
+            response = self._complete("combined", prompt, temperature=0.2, max_tokens=500,
+                                      response_format={"type": "json_object", "schema": COMBINED_INTENT_SCHEMA})
+        except Exception:
+            return None
+        data = self._parse_response(response.choices[0].message.content)
+        if not self._valid_combined(data):
+            return None
+        data["needs_parameters"] = False
+        return data
+
+    def _valid_combined(self, data: dict) -> bool:
+        if "error" in data or not isinstance(data.get("intent"), str) or not data["intent"]:
+            return False
+        parameters = data.setdefault("parameters", {})
+        if not isinstance(parameters, dict):
+            return False
+        tool_name = data.get("tool_to_use")
+        if not tool_name:
+            return True
+        if tool_name not in self.tools.tools:
+            return False
+        known = set(self.tools.tools[tool_name]["parameters"]) | ({"restaurant_name"} if tool_name == "make_reservation" else set())
+        if not set(parameters) <= known:
+            return False
+        if "date" in parameters and not re.fullmatch(r"\d{4}-\d{2}-\d{2}", str(parameters["date"])):
+            return False
+        if "time" in parameters and not re.fullmatch(r"\d{2}:\d{2}", str(parameters["time"])):
+            return False
+        if "party_size" in parameters:
+            if not str(parameters["party_size"]).isdigit():
+                return False
+            parameters["party_size"] = int(parameters["party_size"])
+        if isinstance(parameters.get("restaurant_id"), str) and parameters["restaurant_id"].strip().isdigit():
+            # a name given as the id is resolved later; digits are the id itself
+            parameters["restaurant_id"] = int(parameters["restaurant_id"])
+        if "updates" in parameters and not isinstance(parameters["updates"], dict):
+            return False
+        return True
+
+    def _local_reply(self, route: Route) -> str:
+        try:
+            tool_response = self.tools.execute_tool(route.tool, route.parameters)
+        except Exception as e:
+            return f"Sorry, something went wrong: {str(e)}"
+
+        if route.tool == "find_restaurants":
+            cuisine, location = route.parameters.get("cuisine"), route.parameters.get("location")
+            criteria = f"{cuisine.title() + ' ' if cuisine else ''}restaurants{' in ' + location.title() if location else ''}"
+            if not tool_response:
+                return f"Sorry, I couldn't find any {criteria} right now."
+            formatted_restaurants = "\n".join(
+                f"- **{r['name']}** ({r['cuisine']}, {r['location']}) — "
+                f"Capacity: {r['capacity']}, Rating: {r['rating']}, Price: {r.get('price_range', 'N/A') or 'N/A'}"
+                for r in tool_response
+            )
+            return (f"Here are some {criteria}:\n\n{formatted_restaurants}\n\n"
+                    "If you'd like to make a reservation, please provide the restaurant name, date, time, "
+                    "party size, and any special requests.")
+
+        if not tool_response.get("success"):
+            reply = f"Sorry, I couldn't do that: {tool_response.get('error', 'an unknown error occurred')}"
+            suggestions = self._format_suggestions(tool_response)
+            if suggestions:
+                reply += f"\n\nTimes that can still be booked: {suggestions}."
+            alternatives = self._format_alternatives(tool_response)
+            if alternatives:
+                reply += f"\n\nSimilar restaurants with room at that time: {alternatives}."
+            return reply
+        if route.tool == "cancel_reservation":
+            return f"Your reservation {route.parameters['reservation_id']} has been canceled."
+        if route.tool == "cancel_reservations_bulk":
+            return f"Done! {tool_response['message']}: {', '.join(route.parameters['reservation_ids'])}."
+        updated = tool_response["updated"]
+        restaurant = self.db.restaurants.get(updated["restaurant_id"])
+        return (f"Your reservation {updated['id']} is updated: "
+                f"{restaurant.name if restaurant else 'Restaurant ID ' + str(updated['restaurant_id'])} on "
+                f"{updated['date']} at {updated['time']} for {updated['party_size']} people. "
+                "Your reservation details are shown in the sidebar.")
+
+    def _did_you_mean(self, typed: str, match: dict) -> str:
+        # a fuzzy name match is never booked unasked; kept in the history so a "yes" can confirm it
+        reply = (f"I couldn't find a restaurant named **{typed}**. Did you mean **{match['name']}** "
+                 f"({match['cuisine']}, {match['location']})? Please confirm the restaurant and I'll book it.")
+        self.conversation_history.append({"role": "assistant", "content": reply})
+        return reply
+
+    @staticmethod
+    def _format_suggestions(tool_response: dict) -> str:
+        # nearest bookable times from a "slot full" failure, "" if there are none
+        return ", ".join(f"{s['date']} {s['time']}" for s in tool_response.get("suggestions") or [])
+
+    @staticmethod
+    def _format_alternatives(tool_response: dict) -> str:
+        # similar venues that can take the party at the requested slot, "" if there are none
+        return ", ".join(
+            f"**{r['name']}** ({r['cuisine']}, {r['location']}, rating {r['rating']})"
+            for r in tool_response.get("alternatives") or []
+        )
+
     def _parse_response(self, response_text: str) -> dict:
 
         # find a valid JSON block
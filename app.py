@@ -1,8 +1,6 @@
 import streamlit as st
 from agent import ReservationAgent
-import json
 import time
-import os
 from utils import load_env
 
 # Set page config
@@ -107,6 +105,81 @@ def local_css():
     """, unsafe_allow_html=True)
 
 
+# ---------- Sidebar Reservations ----------
+PAGE_SIZE = 10
+
+
+def reservation_markdown(res, title: str, restaurants) -> str:
+    restaurant = restaurants.get(res["restaurant_id"])
+    restaurant_name = restaurant.name if restaurant else f"Restaurant ID {res['restaurant_id']}"
+    return f"""
+    **{title}**  
+    **Reservation ID:** {res.get('id', 'N/A')}  
+    **Restaurant Name:** {restaurant_name}  
+    **Name:** {res.get('name', 'N/A')}  
+    **Party Size:** {res.get('party_size', 'N/A')}  
+    **Date:** {res.get('date', 'N/A')}  
+    **Time:** {res.get('time', 'N/A')}  
+    **Special Requests:** {res.get('special_requests', 'N/A') if res.get('special_requests') else 'N/A'}
+    """
+
+
+@st.cache_data(max_entries=8)
+def latest_reservation_block(version: int, catalog_version: int, _snapshot) -> str:
+    # cached per book/catalog version; the underscore keeps Streamlit from hashing the snapshot
+    return reservation_markdown(_snapshot.reservations[-1], "Latest Reservation:", agent.db.restaurants_by_id())
+
+
+def reset_reservation_page():
+    st.session_state.reservation_page = 0
+
+
+def reservation_pages():
+    # one page at a time from the DB, so render cost does not grow with the book
+    restaurants = agent.db.restaurants_by_id()
+    with st.sidebar.expander("🔎 Filter reservations"):
+        name = st.text_input("Guest name", key="reservation_name", on_change=reset_reservation_page)
+        on_date = st.text_input("Date (YYYY-MM-DD)", key="reservation_date", on_change=reset_reservation_page)
+        names = {r.name: r.id for r in sorted(restaurants.values(), key=lambda r: r.name)}
+        restaurant = st.selectbox("Restaurant", ["All restaurants", *names], key="reservation_restaurant",
+                                  on_change=reset_reservation_page)
+        order = st.radio("Sort", ["Newest first", "By date"], key="reservation_sort", horizontal=True,
+                         on_change=reset_reservation_page)
+
+    filters = {
+        "name": name.strip() or None,
+        "date": on_date.strip() or None,
+        "restaurant_id": names.get(restaurant),
+        "sort": "date" if order == "By date" else "newest",
+    }
+    page = st.session_state.get("reservation_page", 0)
+    result = agent.db.list_reservations(offset=page * PAGE_SIZE, limit=PAGE_SIZE, **filters)
+    if not result["success"]:
+        st.sidebar.error(result["error"])
+        return
+    pages = max(1, -(-result["total"] // PAGE_SIZE))
+    if page >= pages:
+        # the book shrank under the current page
+        page = st.session_state.reservation_page = pages - 1
+        result = agent.db.list_reservations(offset=page * PAGE_SIZE, limit=PAGE_SIZE, **filters)
+    if not result["total"]:
+        st.sidebar.info("No reservations match these filters")
+        return
+
+    for i, res in enumerate(result["reservations"], result["offset"] + 1):
+        st.sidebar.markdown(reservation_markdown(res, f"Reservation {i} of {result['total']}", restaurants))
+        st.sidebar.markdown("---")
+
+    previous_col, page_col, next_col = st.sidebar.columns([1, 2, 1])
+    if previous_col.button("◀", disabled=page == 0, key="reservation_previous"):
+        st.session_state.reservation_page = page - 1
+        st.rerun()
+    page_col.markdown(f"Page {page + 1} of {pages}")
+    if next_col.button("▶", disabled=page >= pages - 1, key="reservation_next"):
+        st.session_state.reservation_page = page + 1
+        st.rerun()
+
+
 # ---------- Main Chat App ----------
 def main_app():
     st.title("🍽️ FoodieSpot Reservation Assistant")
@@ -191,56 +264,20 @@ def main_app():
     st.sidebar.subheader("📋 Your Reservations")
 
     try:
-        json_path = os.path.join(os.path.dirname(__file__), "reservations.json")
-        
-        if not os.path.exists(json_path):
+        # rendered from the in-memory book rather than re-reading the reservations file
+        snapshot = agent.db.snapshot()
+
+        if not snapshot.reservations:
             st.sidebar.info("No reservations made yet")
         else:
-            with open(json_path, "r") as f:
-                reservations = json.load(f)
-            
-            if not reservations:
-                st.sidebar.info("No reservations made yet")
+            # toggle
+            show_all = st.sidebar.checkbox("Show All Reservations", value=False)
+
+            if show_all:
+                reservation_pages()
             else:
-                # toggle
-                show_all = st.sidebar.checkbox("Show All Reservations", value=False)
-                
-                if show_all:
-                    for i, res in enumerate(reservations, 1):
-                        restaurant_name = next(
-                            (r.name for r in agent.db.restaurants if r.id == res["restaurant_id"]),
-                            f"Restaurant ID {res['restaurant_id']}"
-                        )
-                        st.sidebar.markdown(f"""
-    **Reservation {i}**  
-    **Reservation ID:** {res.get('id', 'N/A')}  
-    **Restaurant Name:** {(restaurant_name)}  
-    **Name:** {res.get('name', 'N/A')}  
-    **Party Size:** {res.get('party_size', 'N/A')}  
-    **Date:** {res.get('date', 'N/A')}  
-    **Time:** {res.get('time', 'N/A')}  
-    **Special Requests:** {res.get('special_requests', 'N/A') if res.get('special_requests') else 'N/A'}
-                        """)
-                        st.sidebar.markdown("---")
-                else:
-                    latest_res = reservations[-1]
-                    restaurant_name = next(
-                        (r.name for r in agent.db.restaurants if r.id == latest_res["restaurant_id"]),
-                        f"Restaurant ID {latest_res['restaurant_id']}"
-                        )
-                    st.sidebar.markdown(f"""
-    **Latest Reservation:**  
-    **Reservation_id:** {latest_res.get('id', 'N/A')}  
-    **Restaurant Name:** {(restaurant_name)}  
-    **Name:** {latest_res.get('name', 'N/A')}  
-    **Party Size:** {latest_res.get('party_size', 'N/A')}  
-    **Date:** {latest_res.get('date', 'N/A')}  
-    **Time:** {latest_res.get('time', 'N/A')}  
-    **Special Requests:** {latest_res.get('special_requests', 'N/A') if latest_res.get('special_requests') else 'N/A'}
-                    """)
-
-    except json.JSONDecodeError:
-        st.sidebar.error("Error reading reservation data")
+                st.sidebar.markdown(latest_reservation_block(snapshot.version, agent.db.restaurants.version, snapshot))
+
     except Exception as e:
         st.sidebar.error(f"Couldn't load reservation: {str(e)}")
 
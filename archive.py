@@ -0,0 +1,106 @@
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+
+class ReservationArchive:
+    """Past reservations kept out of the working set, one JSON Lines file per
+    month (`<directory>/2025-01.jsonl`).
+
+    Writers append and fsync. A month is parsed only when a history query
+    needs it, and re-read once its file changes. Records are keyed by id, so
+    a row archived twice (a crash between the archive append and the store
+    delete) is still read back once. `high_water.json` keeps the id
+    generator's high-water mark, so archived ids are not issued again after
+    a restart without reading every month.
+    """
+
+    def __init__(self, directory: str = "reservations_archive"):
+        self.directory = directory
+        self._lock = threading.Lock()
+        # month -> (file version, reservation id -> record)
+        self._months: Dict[str, tuple] = {}
+
+    def _path(self, month: str) -> str:
+        return os.path.join(self.directory, f"{month}.jsonl")
+
+    def append(self, records: List[Dict]):
+        by_month: Dict[str, List[Dict]] = {}
+        for record in records:
+            by_month.setdefault(str(record["date"])[:7], []).append(record)
+        os.makedirs(self.directory, exist_ok=True)
+        for month, rows in by_month.items():
+            with open(self._path(month), "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(row) + "\n" for row in rows))
+                f.flush()
+                os.fsync(f.fileno())
+
+    def record_high_water(self, reservation_id: str):
+        # write to a temp file and swap it in so readers never see a partial file
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, "high_water.json")
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump({"reservation_id": reservation_id}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f"{path}.tmp", path)
+
+    def high_water(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.directory, "high_water.json"), "r", encoding="utf-8") as f:
+                return json.load(f).get("reservation_id")
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def months(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name[:-len(".jsonl")] for name in os.listdir(self.directory) if name.endswith(".jsonl"))
+
+    def load(self, month: str) -> List[Dict]:
+        path = self._path(month)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return []
+        version = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            cached = self._months.get(month)
+            if cached and cached[0] == version:
+                return list(cached[1].values())
+        records = {}
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # torn tail of an interrupted append
+                    continue
+                records[record["id"]] = record
+        with self._lock:
+            self._months[month] = (version, records)
+        return list(records.values())
+
+    def query(self, name: Optional[str] = None, restaurant_id: Optional[int] = None,
+              date_from: Optional[str] = None, date_to: Optional[str] = None) -> List[Dict]:
+        # only the months overlapping [date_from, date_to] are read
+        name = " ".join(name.lower().split()) if name else None
+        matches = []
+        for month in self.months():
+            if date_from and month < date_from[:7] or date_to and month > date_to[:7]:
+                continue
+            for record in self.load(month):
+                if name and " ".join(str(record["name"]).lower().split()) != name:
+                    continue
+                if restaurant_id is not None and record["restaurant_id"] != restaurant_id:
+                    continue
+                if date_from and record["date"] < date_from or date_to and record["date"] > date_to:
+                    continue
+                matches.append(record)
+        matches.sort(key=lambda r: (r["date"], r["time"]))
+        return matches
+
+
+def default_archive() -> ReservationArchive:
+    return ReservationArchive(os.getenv("RESERVATION_ARCHIVE_PATH", "reservations_archive"))
@@ -0,0 +1,143 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+import occupancy
+from occupancy import OccupancyEngine
+from restaurant_db import Reservation, RestaurantDB
+from storage import JSONStorage, SQLiteStorage
+
+
+def _make_storage(backend: str, directory: str):
+    if backend == "sqlite":
+        return SQLiteStorage(os.path.join(directory, "bench.db"))
+    return JSONStorage(os.path.join(directory, "bench.json"))
+
+
+def stress_booking(threads: int = 32, attempts: int = 200, backend: str = "sqlite") -> bool:
+    # every thread fights for the same 19:00 slot across all restaurants
+    with tempfile.TemporaryDirectory() as directory:
+        db = RestaurantDB(_make_storage(backend, directory))
+        barrier = threading.Barrier(threads)
+        errors = []
+
+        def worker(n: int):
+            barrier.wait()
+            for i in range(attempts):
+                restaurant_id = 1 + (n + i) % len(db.restaurants)
+                try:
+                    db.make_reservation(restaurant_id, f"Guest {n}-{i}", 2, "2030-01-01", "19:00")
+                except Exception as e:
+                    errors.append(e)
+
+        pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+        start = time.perf_counter()
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+        seated = {}
+        for r in db.reservations.values():
+            seated[r.restaurant_id] = seated.get(r.restaurant_id, 0) + r.party_size
+        overbooked = [r.name for r in db.restaurants if seated.get(r.id, 0) > r.capacity]
+        db.storage.close()
+        persisted = len(RestaurantDB(_make_storage(backend, directory)).reservations)
+
+    print(f"stress[{backend}]: {threads * attempts} attempts in {elapsed:.2f}s, "
+          f"{len(db.reservations)} booked, {persisted} persisted")
+    if errors:
+        print(f"  {len(errors)} exceptions, first: {errors[0]!r}")
+    if overbooked:
+        print(f"  overbooked: {', '.join(overbooked)}")
+    return not errors and not overbooked and persisted == len(db.reservations)
+
+
+@dataclass
+class _DictReservation:
+    # the previous Reservation shape: a plain dataclass with string date/time
+    id: str
+    restaurant_id: int
+    name: str
+    party_size: int
+    date: str
+    time: str
+    special_requests: str
+
+
+def _measure(factory, count: int) -> int:
+    tracemalloc.start()
+    records = [factory(i) for i in range(count)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return size
+
+
+def reservation_memory(count: int = 200000) -> bool:
+    def fields(i: int) -> dict:
+        # fresh strings per record, as they would come out of json.loads
+        return {
+            "id": f"RES-{100000 + i}",
+            "restaurant_id": 1 + i % 25,
+            "name": f"Guest {i % 5000}",
+            "party_size": 2 + i % 6,
+            "date": f"2030-{1 + i % 12:02d}-{1 + i % 28:02d}",
+            "time": f"{11 + i % 12:02d}:{(i % 4) * 15:02d}",
+            "special_requests": "",
+        }
+
+    legacy = _measure(lambda i: _DictReservation(**fields(i)), count)
+    compact = _measure(lambda i: Reservation(**fields(i)), count)
+    print(f"memory[{count} reservations]: dataclass {legacy / 2 ** 20:.1f} MiB, "
+          f"slotted {compact / 2 ** 20:.1f} MiB ({compact / legacy:.0%})")
+    return True
+
+
+def availability_matrix(restaurants: int = 10000, bookings: int = 100000, queries: int = 20) -> bool:
+    # catalog-wide "room for 6 at 20:00?": one tree query per restaurant vs the NumPy matrix
+    if occupancy.np is None:
+        print("availability: numpy is not installed, only the per-restaurant loop is available")
+        return True
+    rng = random.Random(7)
+    day = 741081
+    ids = list(range(1, restaurants + 1))
+    capacities = [rng.randint(20, 80) for _ in ids]
+    durations = [90] * restaurants
+    engine = OccupancyEngine()
+    for i in range(bookings):
+        engine.add(f"RES-{i}", rng.choice(ids), day, rng.randrange(11 * 60, 22 * 60, 15), 90, rng.randint(2, 8))
+
+    start = time.perf_counter()
+    for _ in range(queries):
+        looped = [engine.can_fit(r, day, 20 * 60, 90, 6, c) for r, c in zip(ids, capacities)]
+    loop_time = (time.perf_counter() - start) / queries
+
+    start = time.perf_counter()
+    for _ in range(queries):
+        vectorized = engine.fits_many(ids, day, 20 * 60, durations, capacities, 6)
+    matrix_time = (time.perf_counter() - start) / queries
+
+    print(f"availability[{restaurants} restaurants, {bookings} bookings]: loop {loop_time * 1000:.1f} ms, "
+          f"matrix {matrix_time * 1000:.1f} ms ({loop_time / matrix_time:.0f}x), {sum(vectorized)} with room")
+    return looped == vectorized
+
+
+BENCHMARKS = {
+    "stress": stress_booking,
+    "memory": reservation_memory,
+    "availability": availability_matrix,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FoodieSpot RestaurantDB benchmarks")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    args = parser.parse_args()
+    sys.exit(0 if BENCHMARKS[args.benchmark]() is not False else 1)
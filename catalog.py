@@ -0,0 +1,446 @@
+import bisect
+import heapq
+import json
+import math
+import os
+import re
+import sys
+import threading
+import time
+from array import array
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Dict, Iterator, List, Mapping, Optional, Set, Tuple
+
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "restaurants.jsonl")
+DEFAULT_DINING_DURATION = 90
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+DAY_MINUTES = 24 * 60
+
+# (open, close) minutes from midnight per weekday, Monday first; close may exceed
+# DAY_MINUTES when a venue closes after midnight, None means closed all day
+WeeklyHours = Tuple[Optional[Tuple[int, int]], ...]
+
+
+def _clock_to_minutes(value: str) -> int:
+    hours, _, minutes = value.strip().partition(":")
+    total = int(hours) * 60 + int(minutes or 0)
+    if not 0 <= total <= DAY_MINUTES:
+        raise ValueError(f"invalid clock time {value!r}")
+    return total
+
+
+def compile_opening_hours(opening_hours: Dict[str, str]) -> WeeklyHours:
+    compiled = []
+    for weekday in WEEKDAYS:
+        spec = (opening_hours.get(weekday) or "").strip()
+        if not spec or spec.lower() == "closed":
+            compiled.append(None)
+            continue
+        try:
+            start, end = (_clock_to_minutes(part) for part in spec.split("-"))
+        except ValueError:
+            # a malformed entry should not make the venue unbookable
+            compiled.append((0, DAY_MINUTES))
+            continue
+        if end <= start:
+            # e.g. "18:00-02:00" closes at 02:00 the next morning
+            end += DAY_MINUTES
+        compiled.append((start, end))
+    return tuple(compiled)
+
+
+def parse_price_range(price_range: str) -> Tuple[int, int]:
+    # "₹400-₹8000" -> (400, 8000); a single figure is both ends, no figure is (0, 0)
+    figures = [int(f) for f in re.findall(r"\d+", (price_range or "").replace(",", ""))][:2]
+    if not figures:
+        return 0, 0
+    return min(figures), max(figures)
+
+
+def normalize_term(text: str) -> str:
+    return " ".join(str(text).lower().split())
+
+
+def amenity_terms(amenities) -> List[str]:
+    # a list as given, or a free-text string such as "outdoor, bar" from the tool call
+    if isinstance(amenities, str):
+        amenities = amenities.replace(" and ", ",").split(",")
+    return [term for term in (normalize_term(a) for a in amenities or []) if term]
+
+
+def name_key(text: str) -> str:
+    # "Dilli-6", "dilli 6" and "DILLI6" share the key "dilli6"
+    return "".join(ch for ch in str(text).lower() if ch.isalnum())
+
+
+def name_trigrams(key: str) -> Set[str]:
+    padded = f"$${key}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def weekday_of(day: int) -> int:
+    # day ordinal 1 (0001-01-01) was a Monday
+    return (day - 1) % 7
+
+
+@dataclass
+class Restaurant:
+    id: int
+    name: str
+    cuisine: str
+    location: str
+    capacity: int
+    amenities: List[str]
+    rating: float
+    price_range: str
+    opening_hours: Dict[str, str]
+    # minutes a party holds its seats
+    dining_duration: int = DEFAULT_DINING_DURATION
+    # other names guests use for the venue, matched like the name itself
+    aliases: List[str] = field(default_factory=list)
+
+
+class _CatalogState:
+    # column-oriented view of one version of the catalog file; swapped as a whole on reload
+    __slots__ = ("ids", "positions", "capacity", "duration", "hours", "cuisine", "location", "amenities",
+                 "rating", "price_low", "price_high", "neighbors", "postings", "summaries",
+                 "names", "name_grams", "by_id", "raw")
+
+    def __init__(self):
+        self.ids = array("i")
+        self.positions: Dict[int, int] = {}
+        self.capacity = array("i")
+        self.duration = array("i")
+        self.hours: List[WeeklyHours] = []
+        self.cuisine: List[str] = []
+        self.location: List[str] = []
+        self.amenities: List[frozenset] = []
+        self.rating = array("d")
+        self.price_low = array("i")
+        self.price_high = array("i")
+        # most similar other venues per position, best first
+        self.neighbors: List[Tuple[int, ...]] = []
+        # "cuisine:", "location:" and "amenity:" terms -> positions carrying them;
+        # amenities are posted both whole and per word so "outdoor" finds "outdoor seating"
+        self.postings: Dict[str, Set[int]] = {}
+        # restaurant id -> search result dict, filled as venues are returned
+        self.summaries: Dict[int, Dict] = {}
+        # name_key of every name and alias -> position, for exact lookups
+        self.names: Dict[str, int] = {}
+        # trigram -> (position, trigram count) of every name key containing it
+        self.name_grams: Dict[str, List[Tuple[int, int]]] = {}
+        # every Restaurant by id, built on first use
+        self.by_id: Optional[Mapping[int, Restaurant]] = None
+        # full JSON line per venue, parsed only when the record is needed
+        self.raw: List[str] = []
+
+
+class RestaurantCatalog:
+    """Restaurant catalog backed by a JSON Lines file (one venue per line).
+
+    Only the columns used for filtering are kept decoded; full `Restaurant`
+    records are materialized on demand and held in a small LRU. The file is
+    re-read when its mtime changes, checked at most every `reload_interval`
+    seconds.
+    """
+
+    # similar venues kept per restaurant for alternative suggestions
+    NEIGHBOR_COUNT = 10
+
+    def __init__(self, path: Optional[str] = None, cache_size: int = 1024, reload_interval: float = 1.0):
+        self.path = path or os.getenv("RESTAURANT_CATALOG_PATH", DEFAULT_CATALOG_PATH)
+        self.cache_size = cache_size
+        self.reload_interval = reload_interval
+        self.version = 0
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[int, Restaurant]" = OrderedDict()
+        self._file_version = None
+        self._checked_at = 0.0
+        self._state = _CatalogState()
+        self._load()
+
+    def _stat_version(self):
+        st = os.stat(self.path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def _load(self):
+        state = _CatalogState()
+        file_version = self._stat_version()
+        # most venues share a schedule; keep one compiled copy per distinct one
+        schedules: Dict[WeeklyHours, WeeklyHours] = {}
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                state.positions[record["id"]] = len(state.ids)
+                state.ids.append(record["id"])
+                state.capacity.append(record["capacity"])
+                state.duration.append(record.get("dining_duration", DEFAULT_DINING_DURATION))
+                hours = compile_opening_hours(record.get("opening_hours") or {})
+                state.hours.append(schedules.setdefault(hours, hours))
+                pos = len(state.cuisine)
+                state.cuisine.append(sys.intern(normalize_term(record["cuisine"])))
+                state.location.append(sys.intern(normalize_term(record["location"])))
+                state.amenities.append(frozenset(sys.intern(a) for a in amenity_terms(record["amenities"])))
+                state.postings.setdefault("cuisine:" + state.cuisine[pos], set()).add(pos)
+                state.postings.setdefault("location:" + state.location[pos], set()).add(pos)
+                for amenity in state.amenities[pos]:
+                    for term in {amenity, *amenity.split()}:
+                        state.postings.setdefault("amenity:" + term, set()).add(pos)
+                state.rating.append(record.get("rating") or 0.0)
+                low, high = parse_price_range(record.get("price_range"))
+                state.price_low.append(low)
+                state.price_high.append(high)
+                self._index_names(state, pos, record)
+                state.raw.append(line)
+        self._build_neighbors(state)
+        with self._lock:
+            self._state = state
+            self._cache.clear()
+            self._file_version = file_version
+            self.version += 1
+
+    @staticmethod
+    def _index_names(state: _CatalogState, pos: int, record: Dict):
+        names = [record["name"], *record.get("aliases", [])]
+        if record["name"].lower().startswith("the "):
+            names.append(record["name"][4:])
+        for key in {name_key(name) for name in names} - {""}:
+            state.names.setdefault(key, pos)
+            grams = name_trigrams(key)
+            for gram in grams:
+                state.name_grams.setdefault(gram, []).append((pos, len(grams)))
+
+    def _build_neighbors(self, state: _CatalogState):
+        # candidates share the cuisine, the location or both, and within each of
+        # those groups only the venues closest in rating are scored, so the build
+        # stays O(n * NEIGHBOR_COUNT) however large a group gets
+        groups: Dict[Tuple[str, str], List[int]] = {}
+        for pos in range(len(state.ids)):
+            for key in (("cuisine", state.cuisine[pos]), ("location", state.location[pos]),
+                        (state.cuisine[pos], state.location[pos])):
+                groups.setdefault(key, []).append(pos)
+        ratings = {}
+        for key, members in groups.items():
+            members.sort(key=lambda pos: state.rating[pos])
+            ratings[key] = [state.rating[pos] for pos in members]
+
+        window = self.NEIGHBOR_COUNT
+        for pos in range(len(state.ids)):
+            candidates = set()
+            for key in (("cuisine", state.cuisine[pos]), ("location", state.location[pos]),
+                        (state.cuisine[pos], state.location[pos])):
+                members = groups[key]
+                at = bisect.bisect_left(ratings[key], state.rating[pos])
+                candidates.update(members[max(0, at - window):at + window + 1])
+            candidates.discard(pos)
+            best = heapq.nlargest(self.NEIGHBOR_COUNT, candidates,
+                                  key=lambda other: (self._similarity(state, pos, other), -other))
+            state.neighbors.append(tuple(state.ids[other] for other in best))
+
+    @staticmethod
+    def _similarity(state: _CatalogState, a: int, b: int) -> float:
+        score = 0.0
+        if state.cuisine[a] == state.cuisine[b]:
+            score += 3.0
+        if state.location[a] == state.location[b]:
+            score += 2.0
+        amenities_a, amenities_b = state.amenities[a], state.amenities[b]
+        if amenities_a or amenities_b:
+            score += len(amenities_a & amenities_b) / len(amenities_a | amenities_b)
+        score -= abs(state.rating[a] - state.rating[b]) / 2
+        # price bands compared on a log scale by their midpoints
+        mid_a = (state.price_low[a] + state.price_high[a]) / 2
+        mid_b = (state.price_low[b] + state.price_high[b]) / 2
+        if mid_a > 0 and mid_b > 0:
+            score -= abs(math.log(mid_a / mid_b)) / 2
+        return score
+
+    def refresh(self) -> bool:
+        # hot reload: returns True when a changed catalog file was picked up
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return False
+        self._checked_at = now
+        try:
+            if self._stat_version() == self._file_version:
+                return False
+            self._load()
+        except (OSError, ValueError, KeyError):
+            # keep serving the last good catalog while the file is mid-edit
+            return False
+        return True
+
+    def get(self, restaurant_id: int) -> Optional[Restaurant]:
+        state = self._state
+        pos = state.positions.get(restaurant_id)
+        if pos is None:
+            return None
+        with self._lock:
+            restaurant = self._cache.get(restaurant_id)
+            if restaurant is not None:
+                self._cache.move_to_end(restaurant_id)
+                return restaurant
+        restaurant = Restaurant(**json.loads(state.raw[pos]))
+        with self._lock:
+            if self._state is state:
+                self._cache[restaurant_id] = restaurant
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return restaurant
+
+    def by_id(self) -> Mapping[int, Restaurant]:
+        # read-only id -> Restaurant map of the current catalog version
+        state = self._state
+        if state.by_id is None:
+            state.by_id = MappingProxyType({
+                restaurant_id: Restaurant(**json.loads(state.raw[pos]))
+                for pos, restaurant_id in enumerate(state.ids)
+            })
+        return state.by_id
+
+    def capacity(self, restaurant_id: int) -> int:
+        state = self._state
+        return state.capacity[state.positions[restaurant_id]]
+
+    def rating(self, restaurant_id: int) -> float:
+        state = self._state
+        return state.rating[state.positions[restaurant_id]]
+
+    def price(self, restaurant_id: int) -> Tuple[int, int]:
+        # parsed (low, high) of the price_range string
+        state = self._state
+        pos = state.positions[restaurant_id]
+        return state.price_low[pos], state.price_high[pos]
+
+    def dining_duration(self, restaurant_id: int) -> int:
+        state = self._state
+        pos = state.positions.get(restaurant_id)
+        return DEFAULT_DINING_DURATION if pos is None else state.duration[pos]
+
+    def resolve_name(self, name: str, threshold: float = 0.7, margin: float = 0.2) -> Optional[Tuple[int, bool]]:
+        # (restaurant id, exact) for a typed name: exact on the normalized key or an
+        # alias, else the best trigram Dice similarity at or above `threshold` that
+        # beats the runner-up by `margin`; a fuzzy hit is only a guess to confirm
+        state = self._state
+        key = name_key(name or "")
+        if not key:
+            return None
+        pos = state.names.get(key)
+        if pos is None and str(name).strip().lower().startswith("the "):
+            # "the Boat House" for a venue listed as "Boat House"
+            pos = state.names.get(name_key(str(name).strip()[4:]))
+        if pos is not None:
+            return state.ids[pos], True
+        grams = name_trigrams(key)
+        shared: Counter = Counter()
+        for gram in grams:
+            shared.update(state.name_grams.get(gram, ()))
+        # a venue indexed under several names scores by its closest one
+        scores: Dict[int, float] = {}
+        for (candidate, size), common in shared.items():
+            scores[candidate] = max(scores.get(candidate, 0.0), 2 * common / (len(grams) + size))
+        ranked = heapq.nlargest(2, scores.items(), key=lambda item: (item[1], -state.ids[item[0]]))
+        if not ranked or ranked[0][1] < threshold:
+            return None
+        if len(ranked) > 1 and ranked[0][1] - ranked[1][1] < margin:
+            return None
+        return state.ids[ranked[0][0]], False
+
+    def similar(self, restaurant_id: int) -> Tuple[int, ...]:
+        # precomputed most similar venues, best first
+        state = self._state
+        pos = state.positions.get(restaurant_id)
+        return () if pos is None else state.neighbors[pos]
+
+    def hours_on(self, restaurant_id: int, day: int) -> Optional[Tuple[int, int]]:
+        state = self._state
+        return state.hours[state.positions[restaurant_id]][weekday_of(day)]
+
+    def is_open(self, restaurant_id: int, day: int, minute: int) -> bool:
+        state = self._state
+        hours = state.hours[state.positions[restaurant_id]]
+        weekday = weekday_of(day)
+        today = hours[weekday]
+        if today and today[0] <= minute < today[1]:
+            return True
+        # still inside the previous day's after-midnight service
+        yesterday = hours[(weekday - 1) % 7]
+        return bool(yesterday) and minute < yesterday[1] - DAY_MINUTES
+
+    def match(self, cuisine: str = None, location: str = None,
+              amenities: List[str] = None, min_capacity: int = None,
+              max_price: int = None, min_rating: float = None) -> List[int]:
+        # ids of venues passing the filters, in catalog order, by intersecting posting
+        # sets smallest first; cost follows the matches rather than the catalog size
+        state = self._state
+        terms = []
+        if cuisine:
+            terms.append("cuisine:" + normalize_term(cuisine))
+        if location:
+            terms.append("location:" + normalize_term(location))
+        terms.extend("amenity:" + term for term in amenity_terms(amenities))
+
+        if terms:
+            postings = []
+            for term in terms:
+                posting = state.postings.get(term)
+                if posting is None and term.startswith("amenity:"):
+                    # a multi-word amenity not listed verbatim: require each of its words
+                    words = [state.postings.get("amenity:" + word, set()) for word in term[8:].split()]
+                    posting = set.intersection(*words)
+                if not posting:
+                    return []
+                postings.append(posting)
+            postings.sort(key=len)
+            positions = sorted(postings[0].intersection(*postings[1:]))
+        else:
+            positions = range(len(state.ids))
+
+        # max_price is a budget: a venue qualifies when its cheapest end fits it
+        return [state.ids[pos] for pos in positions
+                if (not min_capacity or state.capacity[pos] >= min_capacity)
+                and (max_price is None or state.price_low[pos] <= max_price)
+                and (min_rating is None or state.rating[pos] >= min_rating)]
+
+    def terms(self, kind: str) -> List[str]:
+        # distinct normalized values of one indexed column: "cuisine", "location" or "amenity"
+        prefix = kind + ":"
+        return sorted(term[len(prefix):] for term in self._state.postings if term.startswith(prefix))
+
+    def summary(self, restaurant_id: int) -> Optional[Dict]:
+        # search result fields of one venue, built once per catalog version; callers get a copy
+        state = self._state
+        cached = state.summaries.get(restaurant_id)
+        if cached is None:
+            restaurant = self.get(restaurant_id)
+            if restaurant is None:
+                return None
+            cached = {
+                "id": restaurant.id,
+                "name": restaurant.name,
+                "cuisine": restaurant.cuisine,
+                "location": restaurant.location,
+                "capacity": restaurant.capacity,
+                "amenities": restaurant.amenities,
+                "rating": restaurant.rating,
+                "price_range": restaurant.price_range
+            }
+            state.summaries[restaurant_id] = cached
+        return dict(cached)
+
+    def ids(self) -> List[int]:
+        return list(self._state.ids)
+
+    def __len__(self) -> int:
+        return len(self._state.ids)
+
+    def __iter__(self) -> Iterator[Restaurant]:
+        for restaurant_id in self.ids():
+            restaurant = self.get(restaurant_id)
+            if restaurant is not None:
+                yield restaurant
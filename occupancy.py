@@ -0,0 +1,229 @@
+from array import array
+from typing import Dict, List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # the per-day matrix is an optional speed-up for catalog-wide checks
+    np = None
+
+# occupancy is tracked in buckets of this many minutes; a booking holds every
+# bucket it touches, so search and booking round the same way
+SLOT_MINUTES = 5
+# trees and matrices cover one calendar day; a sitting that runs past midnight is
+# split and its tail held on the next day, so a 23:30 and a 00:30 sitting meet
+DAY_BUCKETS = 24 * 60 // SLOT_MINUTES
+# a window measured from one day's start may run up to a day into the next
+HORIZON_BUCKETS = 2 * DAY_BUCKETS
+
+
+def to_buckets(start_minute: int, duration: int) -> Tuple[int, int]:
+    # [lo, hi) bucket range covered by a sitting, counted from its own day's midnight
+    lo = start_minute // SLOT_MINUTES
+    hi = -(-(start_minute + duration) // SLOT_MINUTES)
+    return max(0, lo), min(HORIZON_BUCKETS, max(hi, lo + 1))
+
+
+def day_parts(day: int, lo: int, hi: int) -> List[Tuple[int, int, int]]:
+    # split a bucket range counted from `day` into (day, lo, hi) ranges within one day each
+    parts = []
+    while lo < hi:
+        parts.append((day, lo, min(hi, DAY_BUCKETS)))
+        day, lo, hi = day + 1, max(0, lo - DAY_BUCKETS), hi - DAY_BUCKETS
+    return parts
+
+
+def _scan_peak(sittings, lo: int, hi: int) -> int:
+    # peak over [lo, hi) from a few (lo, hi, seats) sittings: it is reached at `lo`
+    # or where one of them starts
+    points = {lo}.union(s_lo for s_lo, _, _ in sittings if lo < s_lo < hi)
+    return max(sum(seats for s_lo, s_hi, seats in sittings if s_lo <= point < s_hi) for point in points)
+
+
+class SeatTree:
+    """Segment tree over the buckets of one restaurant-day.
+
+    Supports adding seats to a bucket range and reading the peak seats in use
+    over a range, both O(log n). Lazy adds stay on the node that absorbed them
+    instead of being pushed down. Nodes are C ints, about 9 KB per day.
+    """
+
+    def __init__(self, size: int = DAY_BUCKETS):
+        self.size = size
+        self._max = array("i", [0]) * (4 * size)
+        self._add = array("i", [0]) * (4 * size)
+
+    def add(self, lo: int, hi: int, seats: int):
+        self._update(1, 0, self.size, lo, hi, seats)
+
+    def peak(self, lo: int, hi: int) -> int:
+        return self._query(1, 0, self.size, lo, hi)
+
+    def _update(self, node: int, node_lo: int, node_hi: int, lo: int, hi: int, seats: int):
+        if hi <= node_lo or node_hi <= lo:
+            return
+        if lo <= node_lo and node_hi <= hi:
+            self._max[node] += seats
+            self._add[node] += seats
+            return
+        mid = (node_lo + node_hi) // 2
+        self._update(2 * node, node_lo, mid, lo, hi, seats)
+        self._update(2 * node + 1, mid, node_hi, lo, hi, seats)
+        self._max[node] = max(self._max[2 * node], self._max[2 * node + 1]) + self._add[node]
+
+    def _query(self, node: int, node_lo: int, node_hi: int, lo: int, hi: int) -> int:
+        if hi <= node_lo or node_hi <= lo:
+            return 0
+        if lo <= node_lo and node_hi <= hi:
+            return self._max[node]
+        mid = (node_lo + node_hi) // 2
+        return max(
+            self._query(2 * node, node_lo, mid, lo, hi),
+            self._query(2 * node + 1, mid, node_hi, lo, hi)
+        ) + self._add[node]
+
+
+class OccupancyEngine:
+    """Seats in use per (restaurant_id, day ordinal).
+
+    Sittings are registered under a key (the reservation id) with the exact
+    bucket ranges they were added with, so removal stays correct even if the
+    restaurant's dining duration changes in the meantime. A sitting that runs
+    past midnight is held on both days. Restaurant-days with only a few
+    sittings are answered by scanning them; a SeatTree is built once a day
+    gets busy and dropped again when it empties.
+
+    With NumPy installed the same sittings are also kept in one int16 matrix
+    per day, with a row only for the restaurants booked that day, so
+    `fits_many` checks a whole catalog with a few vectorized window maxima
+    instead of one query per restaurant.
+    """
+
+    # sittings on one restaurant-day before its peaks come from a SeatTree
+    TREE_MIN_SITTINGS = 16
+
+    def __init__(self):
+        self._trees: Dict[Tuple[int, int], SeatTree] = {}
+        # (restaurant_id, day) -> sitting key -> (lo, hi, seats)
+        self._sittings: Dict[Tuple[int, int], Dict[str, Tuple[int, int, int]]] = {}
+        # sitting key -> the restaurant-days it holds seats on
+        self._placed: Dict[str, Tuple[Tuple[int, int], ...]] = {}
+        # day -> restaurant_id -> row of that day's matrix
+        self._rows: Dict[int, Dict[int, int]] = {}
+        # day -> seats in use per (row, bucket), and the number of sittings behind it
+        self._matrices: Dict[int, "np.ndarray"] = {}
+        self._day_sittings: Dict[int, int] = {}
+
+    def clear(self):
+        self._trees.clear()
+        self._sittings.clear()
+        self._placed.clear()
+        self._rows.clear()
+        self._matrices.clear()
+        self._day_sittings.clear()
+
+    def add(self, key: str, restaurant_id: int, day: int, start_minute: int, duration: int, seats: int):
+        self.remove(key)
+        shards = []
+        for part_day, lo, hi in day_parts(day, *to_buckets(start_minute, duration)):
+            shard = (restaurant_id, part_day)
+            sittings = self._sittings.setdefault(shard, {})
+            sittings[key] = (lo, hi, seats)
+            tree = self._trees.get(shard)
+            if tree is not None:
+                tree.add(lo, hi, seats)
+            elif len(sittings) >= self.TREE_MIN_SITTINGS:
+                tree = self._trees[shard] = SeatTree()
+                for s_lo, s_hi, s_seats in sittings.values():
+                    tree.add(s_lo, s_hi, s_seats)
+            if np is not None:
+                self._matrix_add(restaurant_id, part_day, lo, hi, seats, 1)
+            shards.append(shard)
+        self._placed[key] = tuple(shards)
+
+    def remove(self, key: str):
+        for shard in self._placed.pop(key, ()):
+            lo, hi, seats = self._sittings[shard].pop(key)
+            if not self._sittings[shard]:
+                del self._sittings[shard]
+                self._trees.pop(shard, None)
+            elif shard in self._trees:
+                self._trees[shard].add(lo, hi, -seats)
+            if np is not None:
+                self._matrix_add(shard[0], shard[1], lo, hi, -seats, -1)
+
+    def _matrix_add(self, restaurant_id: int, day: int, lo: int, hi: int, seats: int, sittings: int):
+        rows = self._rows.setdefault(day, {})
+        row = rows.setdefault(restaurant_id, len(rows))
+        matrix = self._matrices.get(day)
+        if matrix is None or matrix.shape[0] <= row:
+            # grow by doubling so appends stay amortized O(1) per restaurant; seats in
+            # use at one venue stay far below the int16 limit
+            grown = np.zeros((max(row + 1, 2 * (0 if matrix is None else matrix.shape[0])), DAY_BUCKETS),
+                             dtype=np.int16)
+            if matrix is not None:
+                grown[:matrix.shape[0]] = matrix
+            matrix = self._matrices[day] = grown
+        matrix[row, lo:hi] += seats
+        count = self._day_sittings.get(day, 0) + sittings
+        if count:
+            self._day_sittings[day] = count
+        else:
+            del self._day_sittings[day]
+            del self._matrices[day]
+            del self._rows[day]
+
+    def peak(self, restaurant_id: int, day: int, start_minute: int, duration: int) -> int:
+        # every bucket lives on exactly one day, so the window peak is the max of its parts
+        peak = 0
+        for part_day, lo, hi in day_parts(day, *to_buckets(start_minute, duration)):
+            shard = (restaurant_id, part_day)
+            tree = self._trees.get(shard)
+            if tree is not None:
+                peak = max(peak, tree.peak(lo, hi))
+            elif shard in self._sittings:
+                peak = max(peak, _scan_peak(self._sittings[shard].values(), lo, hi))
+        return peak
+
+    def can_fit(self, restaurant_id: int, day: int, start_minute: int, duration: int,
+                seats: int, capacity: int) -> bool:
+        return self.peak(restaurant_id, day, start_minute, duration) + seats <= capacity
+
+    def fits_many(self, restaurant_ids: Sequence[int], day: int, start_minute: int,
+                  durations: Sequence[int], capacities: Sequence[int], seats: int) -> List[bool]:
+        # can_fit for many restaurants at once; durations/capacities line up with restaurant_ids
+        if np is None:
+            return [self.can_fit(restaurant_id, day, start_minute, duration, seats, capacity)
+                    for restaurant_id, duration, capacity in zip(restaurant_ids, durations, capacities)]
+        peaks = np.zeros(len(restaurant_ids), dtype=np.int32)
+        if len(restaurant_ids):
+            durations = np.asarray(durations)
+            windows = {int(duration): day_parts(day, *to_buckets(start_minute, int(duration)))
+                       for duration in np.unique(durations)}
+            # one window max per day touched and distinct dining duration, usually just one
+            for part_day in sorted({part[0] for parts in windows.values() for part in parts}):
+                matrix = self._matrices.get(part_day)
+                if matrix is None:
+                    continue
+                day_rows = self._rows[part_day]
+                rows = np.fromiter((day_rows.get(r, -1) for r in restaurant_ids), dtype=np.int64,
+                                   count=len(restaurant_ids))
+                for duration, parts in windows.items():
+                    for _, lo, hi in (part for part in parts if part[0] == part_day):
+                        selected = (durations == duration) & (rows >= 0)
+                        peaks[selected] = np.maximum(peaks[selected], matrix[rows[selected], lo:hi].max(axis=1))
+        return (peaks + seats <= np.asarray(capacities)).tolist()
+
+    def profile(self, restaurant_id: int, day: int) -> List[int]:
+        # seats in use per bucket of `day` and the day after, so windows starting late
+        # can be read across midnight; one prefix-sum sweep over both days' sittings
+        delta = [0] * (HORIZON_BUCKETS + 1)
+        for part_day, offset in ((day, 0), (day + 1, DAY_BUCKETS)):
+            for lo, hi, seats in self._sittings.get((restaurant_id, part_day), {}).values():
+                delta[offset + lo] += seats
+                delta[offset + hi] -= seats
+        in_use = []
+        running = 0
+        for change in delta[:HORIZON_BUCKETS]:
+            running += change
+            in_use.append(running)
+        return in_use
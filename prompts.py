@@ -17,7 +17,7 @@ Rules:
 - MUST be a full valid JSON object, wrapped in a markdown block with ```json.
 - Do not include Comments (// ...)
 - If the user asks for restaurant recommendations, the intent is find_restaurants.
-- If the user asks to show all reservations, say reservation can be seen in the sidebar.
+- If the user asks to see their reservations ("what are my bookings?"), the intent is find_reservations with the name they booked under; if no name is given, say all reservations can be seen in the sidebar.
 - When extracting restaurant_id, it MUST be the actual numerical ID from our database, not the name.
 - If the user says something like "cancel RES-XXXX" or "cancel my reservation", the intent is cancel_reservation and you must extract reservation_id if available.
 - Always provide restaurant options in bullet forms.
@@ -40,6 +40,57 @@ Example (making a reservation):
 }}
 """
 
+COMBINED_INTENT_PROMPT = """Determine the user's intent, the tool to call and ALL of its parameters in one answer.
+When mentioning restaurants, you MUST use the exact numerical ID from Available Restaurants.
+Available Restaurants:
+{restaurants_list}
+
+Conversation History:
+{conversation_history}
+
+Available Tools:
+{tools_description}
+
+User Input: "{user_input}"
+
+Rules:
+- Respond with ONLY one valid JSON object with the keys "intent", "tool_to_use" and "parameters".
+- "tool_to_use" is one of the Available Tools, or null when no tool is needed.
+- "parameters" uses the exact parameter names of that tool; for make_reservation you may give "restaurant_name" instead of "restaurant_id".
+- Dates are YYYY-MM-DD, times are HH:MM (24h), party_size is a number.
+- Extract only the parameters that are clearly provided by the user. DO NOT make assumptions; omit anything not given.
+- If the user asks for restaurant recommendations, the intent is find_restaurants.
+- If the user asks to see their reservations, the intent is find_reservations with the name they booked under.
+- If the user says something like "cancel RES-XXXX", the intent is cancel_reservation with that reservation_id.
+- For modify_reservation, put the changed fields (date, time, party_size, ...) inside "updates".
+
+Example:
+```json
+{{
+  "intent": "make_reservation",
+  "tool_to_use": "make_reservation",
+  "parameters": {{
+    "restaurant_name": "Red Cafe",
+    "name": "John Doe",
+    "party_size": 4,
+    "date": "2025-05-25",
+    "time": "19:00",
+    "special_requests": "Window seat"
+  }}
+}}
+```"""
+
+# JSON schema the combined call is constrained to
+COMBINED_INTENT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "intent": {"type": "string"},
+        "tool_to_use": {"type": ["string", "null"]},
+        "parameters": {"type": "object"}
+    },
+    "required": ["intent", "tool_to_use", "parameters"]
+}
+
 PARAMETER_EXTRACTION_PROMPT = """Extract relevant parameters from the user input for the specified intent.
 
 Available Restaurants:
@@ -107,7 +158,10 @@ If the intent is "show_reservation" and the reservation is successfully found:
 ERROR_PROMPT = """An error occurred:
 {error_message}
 
-Explain this in 1-2 sentences and state exactly what's needed to fix it. Never suggest contacting the restaurant directly."""
+Nearest times that can still be booked: {suggestions}
+Similar restaurants with room at the requested time: {alternatives}
+
+Explain this in 1-2 sentences and state exactly what's needed to fix it. If times or restaurants are listed above, offer them so the user can pick one. Never suggest contacting the restaurant directly."""
 
 RECOMMENDATION_PROMPT = """The user is looking for restaurant recommendations. Here are some available restaurants:
 {restaurants_list}
@@ -0,0 +1,80 @@
+import re
+import threading
+import time
+from typing import Optional
+
+_SEQUENTIAL_ID = re.compile(r"RES-(\d+)")
+_BASE36 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def _to_base36(value: int, width: int) -> str:
+    digits = []
+    for _ in range(width):
+        value, rem = divmod(value, 36)
+        digits.append(_BASE36[rem])
+    return "".join(reversed(digits))
+
+
+class ReservationIdGenerator:
+    """Issues reservation ids without scanning existing reservations.
+
+    RestaurantDB calls `observe` for every id it loads or merges from another
+    process, and still rejects an id already in its dict, so uniqueness holds
+    across restarts and worker processes. Ids moved to the archive are covered
+    by `high_water`, which the archive keeps and RestaurantDB observes on start.
+    """
+
+    def observe(self, reservation_id: str):
+        pass
+
+    def high_water(self) -> Optional[str]:
+        # an id that, once observed, keeps every id issued so far from coming back;
+        # None when ids can never repeat anyway
+        return None
+
+    def next_id(self) -> str:
+        raise NotImplementedError
+
+
+class SequentialIdGenerator(ReservationIdGenerator):
+    # RES-100000, RES-100001, ... resuming after the highest numeric id seen in
+    # the store; starts above the legacy random RES-NNNNN range
+    def __init__(self, start: int = 100000):
+        self._next = start
+        self._lock = threading.Lock()
+
+    def observe(self, reservation_id: str):
+        match = _SEQUENTIAL_ID.fullmatch(reservation_id or "")
+        if match:
+            with self._lock:
+                self._next = max(self._next, int(match.group(1)) + 1)
+
+    def next_id(self) -> str:
+        with self._lock:
+            value = self._next
+            self._next += 1
+        return f"RES-{value}"
+
+    def high_water(self) -> Optional[str]:
+        with self._lock:
+            return f"RES-{self._next - 1}"
+
+
+class TimeOrderedIdGenerator(ReservationIdGenerator):
+    # RES- + 9 base36 chars of epoch milliseconds + 2 chars of per-millisecond
+    # counter; fixed width, so ids sort by creation time and are never reissued
+    def __init__(self):
+        self._last_ms = 0
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def next_id(self) -> str:
+        with self._lock:
+            now_ms = int(time.time() * 1000)
+            if now_ms > self._last_ms:
+                self._last_ms, self._counter = now_ms, 0
+            else:
+                self._counter += 1
+                if self._counter >= 36 ** 2:
+                    self._last_ms, self._counter = self._last_ms + 1, 0
+            return f"RES-{_to_base36(self._last_ms, 9)}{_to_base36(self._counter, 2)}"
@@ -1,663 +1,851 @@
-import json
-import random
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional
-import os
+import bisect
+import heapq
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 from dataclasses import dataclass
+from datetime import date, datetime
+from time import monotonic
+from types import MappingProxyType
+from typing import List, Dict, Mapping, Optional, Set, Tuple, Union
+from archive import ReservationArchive, default_archive
+from catalog import WEEKDAYS, Restaurant, RestaurantCatalog, weekday_of
+from occupancy import SLOT_MINUTES, OccupancyEngine, to_buckets
+from storage import RESERVATION_FIELDS, ReservationStorage, default_storage
+from reservation_ids import ReservationIdGenerator, SequentialIdGenerator
+
+def _to_minutes(time_str: str) -> int:
+    # "HH:MM" -> minute of day
+    hours, sep, minutes = time_str.strip().partition(":")
+    if not sep or not hours.isdigit() or len(minutes) != 2 or not minutes.isdigit():
+        raise ValueError(f"invalid time {time_str!r}")
+    hours, minutes = int(hours), int(minutes)
+    if hours > 23 or minutes > 59:
+        raise ValueError(f"invalid time {time_str!r}")
+    return hours * 60 + minutes
+
+def _guest_key(name: str) -> str:
+    return " ".join(str(name).lower().split())
+
+def _to_day(date_str: str) -> int:
+    # "YYYY-MM-DD" -> proleptic Gregorian ordinal
+    if len(date_str) != 10:
+        raise ValueError(f"invalid date {date_str!r}")
+    return date.fromisoformat(date_str).toordinal()
 
-@dataclass
-class Restaurant:
-    id: int
-    name: str
-    cuisine: str
-    location: str
-    capacity: int
-    amenities: List[str]
-    rating: float
-    price_range: str
-    opening_hours: Dict[str, str]
-
-@dataclass
 class Reservation:
-    id: str
-    restaurant_id: int
-    name: str
-    party_size: int
-    date: str
-    time: str
-    special_requests: str
+    """A booking held in compact form: the date as a day ordinal and the time as
+    minute of day. `date`/`time` still read and write the original strings, and
+    `to_dict()` gives the record shape used by storage and the tools. Values
+    that do not parse (legacy rows) are kept verbatim and never match a slot.
+    """
+    __slots__ = ("id", "restaurant_id", "name", "party_size", "day", "minute", "special_requests")
+
+    def __init__(self, id: str, restaurant_id: int, name: str, party_size: int,
+                 date: str, time: str, special_requests: str = ""):
+        self.id = id
+        self.restaurant_id = restaurant_id
+        self.name = name
+        self.party_size = party_size
+        self.date = date
+        self.time = time
+        self.special_requests = special_requests
+
+    @property
+    def date(self) -> str:
+        return date.fromordinal(self.day).isoformat() if isinstance(self.day, int) else self.day
+
+    @date.setter
+    def date(self, value: str):
+        try:
+            self.day = _to_day(value)
+        except (TypeError, ValueError):
+            self.day = value
+
+    @property
+    def time(self) -> str:
+        return f"{self.minute // 60:02d}:{self.minute % 60:02d}" if isinstance(self.minute, int) else self.minute
+
+    @time.setter
+    def time(self, value: str):
+        try:
+            self.minute = _to_minutes(value)
+        except (AttributeError, ValueError):
+            self.minute = value
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "restaurant_id": self.restaurant_id,
+            "name": self.name,
+            "party_size": self.party_size,
+            "date": self.date,
+            "time": self.time,
+            "special_requests": self.special_requests
+        }
+
+@dataclass(frozen=True)
+class ReservationSnapshot:
+    # read-only view of the book at one RestaurantDB.version, in booking order
+    version: int
+    reservations: Tuple[Mapping, ...]
 
 class RestaurantDB:
-    def __init__(self):
-        self.restaurants = self._load_fixed_restaurants()
-        self.reservations = []
-        self.reservation_file = "reservations.json"
-        self._load_reservations_from_file()
-    
-    def _load_fixed_restaurants(self) -> List[Restaurant]:
-        fixed_restaurants = [
-            Restaurant(
-                id=1,
-                name="Taj Mahal Bistro",
-                cuisine="North Indian",
-                location="Downtown",
-                capacity=50,
-                amenities=["private dining", "valet parking", "wheelchair accessible"],
-                rating=4.6,
-                price_range="₹400-₹8000",
-                opening_hours={
-                    "Monday": "11:00-23:00",
-                    "Tuesday": "11:00-23:00",
-                    "Wednesday": "11:00-23:00",
-                    "Thursday": "11:00-23:00",
-                    "Friday": "11:00-24:00",
-                    "Saturday": "10:00-24:00",
-                    "Sunday": "10:00-23:00"
-                }
-            ),
-            Restaurant(
-                id=2,
-                name="Coastal Spice",
-                cuisine="South Indian",
-                location="Midtown",
-                capacity=45,
-                amenities=["live music", "outdoor seating"],
-                rating=4.5,
-                price_range="₹300-₹5000",
-                opening_hours={
-                    "Monday": "11:00-22:30",
-                    "Tuesday": "11:00-22:30",
-                    "Wednesday": "11:00-23:00",
-                    "Thursday": "11:00-23:00",
-                    "Friday": "11:00-23:30",
-                    "Saturday": "10:00-23:30",
-                    "Sunday": "10:00-22:30"
-                }
-            ),
-            Restaurant(
-                id=3,
-                name="Punjab Grill House",
-                cuisine="North Indian",
-                location="Uptown",
-                capacity=60,
-                amenities=["bar", "live tandoor counter"],
-                rating=4.7,
-                price_range="₹350-₹7000",
-                opening_hours={
-                    "Monday": "11:00-23:00",
-                    "Tuesday": "11:00-23:00",
-                    "Wednesday": "11:00-23:30",
-                    "Thursday": "11:00-23:30",
-                    "Friday": "11:00-24:00",
-                    "Saturday": "10:00-24:00",
-                    "Sunday": "10:00-23:00"
-                }
-            ),
-            Restaurant(
-                id=4,
-                name="South Palace",
-                cuisine="South Indian",
-                location="Outskirts",
-                capacity=55,
-                amenities=["banquet hall", "outdoor seating"],
-                rating=4.4,
-                price_range="₹250-₹4500",
-                opening_hours={
-                    "Monday": "11:00-22:00",
-                    "Tuesday": "11:00-22:00",
-                    "Wednesday": "11:00-22:30",
-                    "Thursday": "11:00-22:30",
-                    "Friday": "11:00-23:00",
-                    "Saturday": "10:00-23:00",
-                    "Sunday": "10:00-22:00"
-                }
-            ),
-            Restaurant(
-                id=5,
-                name="Classic Dhaba",
-                cuisine="North Indian",
-                location="Downtown",
-                capacity=40,
-                amenities=["river view", "cultural performances"],
-                rating=4.8,
-                price_range="₹500-₹9000",
-                opening_hours={
-                    "Monday": "11:00-22:30",
-                    "Tuesday": "11:00-22:30",
-                    "Wednesday": "11:00-23:00",
-                    "Thursday": "11:00-23:00",
-                    "Friday": "11:00-23:30",
-                    "Saturday": "10:00-23:30",
-                    "Sunday": "10:00-22:30"
-                }
-            ),
-            Restaurant(
-                id=6,
-                name="Rajasthani Darbar",
-                cuisine="North Indian",
-                location="Midtown",
-                capacity=65,
-                amenities=["traditional seating", "folk dance shows"],
-                rating=4.3,
-                price_range="₹300-₹6000",
-                opening_hours={
-                    "Monday": "11:00-23:00",
-                    "Tuesday": "11:00-23:00",
-                    "Wednesday": "11:00-23:30",
-                    "Thursday": "11:00-23:30",
-                    "Friday": "11:00-24:00",
-                    "Saturday": "10:00-24:00",
-                    "Sunday": "10:00-23:00"
-                }
-            ),
-            Restaurant(
-                id=7,
-                name="Goan Shack",
-                cuisine="Multicuisine",
-                location="Uptown",
-                capacity=5,
-                amenities=["beach theme", "bar"],
-                rating=4.6,
-                price_range="₹400-₹7500",
-                opening_hours={
-                    "Monday": "11:00-23:00",
-                    "Tuesday": "11:00-23:00",
-                    "Wednesday": "11:00-23:30",
-                    "Thursday": "11:00-23:30",
-                    "Friday": "11:00-24:00",
-                    "Saturday": "10:00-24:00",
-                    "Sunday": "10:00-23:00"
-                }
-            ),
-            Restaurant(
-                id=8,
-                name="Hyderabad House",
-                cuisine="Multicuisine",
-                location="Outskirts",
-                capacity=70,
-                amenities=["banquet hall", "sheesha lounge"],
-                rating=4.9,
-                price_range="₹450-₹10000",
-                opening_hours={
-                    "Monday": "11:00-23:00",
-                    "Tuesday": "11:00-23:00",
-                    "Wednesday": "11:00-23:30",
-                    "Thursday": "11:00-23:30",
-                    "Friday": "11:00-24:00",
-                    "Saturday": "10:00-24:00",
-                    "Sunday": "10:00-23:00"
-                }
-            ),
-            Restaurant(
-                id=9,
-                name="Gujarati Bhavan",
-                cuisine="North Indian",
-                location="Downtown",
-                capacity=50,
-                amenities=["thali service", "vegetarian only"],
-                rating=4.2,
-                price_range="₹200-₹4000",
-                opening_hours={
-                    "Monday": "11:00-22:00",
-                    "Tuesday": "11:00-22:00",
-                    "Wednesday": "11:00-22:30",
-                    "Thursday": "11:00-22:30",
-                    "Friday": "11:00-23:00",
-                    "Saturday": "10:00-23:00",
-                    "Sunday": "10:00-22:00"
-                }
-            ),
-            Restaurant(
-                id=10,
-                name="Kashmiri Kitchen",
-                cuisine="North Indian",
-                location="Midtown",
-                capacity=30,
-                amenities=["mountain view", "hookah"],
-                rating=4.7,
-                price_range="₹500-₹8500",
-                opening_hours={
-                    "Monday": "11:00-22:30",
-                    "Tuesday": "11:00-22:30",
-                    "Wednesday": "11:00-23:00",
-                    "Thursday": "11:00-23:00",
-                    "Friday": "11:00-23:30",
-                    "Saturday": "10:00-23:30",
-                    "Sunday": "10:00-22:30"
-                }
-            ),
-            Restaurant(
-                id=11,
-                name="Awadhi Lounge",
-                cuisine="Multicuisine",
-                location="Uptown",
-                capacity=45,
-                amenities=["live ghazals", "royal decor"],
-                rating=4.8,
-                price_range="₹600-₹12000",
-                opening_hours={
-                    "Monday": "11:00-23:00",
-                    "Tuesday": "11:00-23:00",
-                    "Wednesday": "11:00-23:30",
-                    "Thursday": "11:00-23:30",
-                    "Friday": "11:00-24:00",
-                    "Saturday": "10:00-24:00",
-                    "Sunday": "10:00-23:00"
-                }
-            ),
-            Restaurant(
-                id=12,
-                name="Konkan Express",
-                cuisine="Multicuisine",
-                location="Outskirts",
-                capacity=40,
-                amenities=["fishing pond", "boat seating"],
-                rating=4.5,
-                price_range="₹350-₹6500",
-                opening_hours={
-                    "Monday": "11:00-22:00",
-                    "Tuesday": "11:00-22:00",
-                    "Wednesday": "11:00-22:30",
-                    "Thursday": "11:00-22:30",
-                    "Friday": "11:00-23:00",
-                    "Saturday": "10:00-23:00",
-                    "Sunday": "10:00-22:00"
-                }
-            ),
-            Restaurant(
-                id=13,
-                name="Retro Dhaba",
-                cuisine="Multicuisine",
-                location="Downtown",
-                capacity=55,
-                amenities=["retro decor", "bar"],
-                rating=4.4,
-                price_range="₹400-₹7000",
-                opening_hours={
-                    "Monday": "11:00-23:00",
-                    "Tuesday": "11:00-23:00",
-                    "Wednesday": "11:00-23:30",
-                    "Thursday": "11:00-23:30",
-                    "Friday": "11:00-24:00",
-                    "Saturday": "10:00-24:00",
-                    "Sunday": "10:00-23:00"
-                }
-            ),
-            Restaurant(
-                id=14,
-                name="Rasoi Khana",
-                cuisine="North Indian",
-                location="Midtown",
-                capacity=60,
-                amenities=["live litti chokha counter", "cultural shows"],
-                rating=4.3,
-                price_range="₹250-₹4500",
-                opening_hours={
-                    "Monday": "11:00-22:30",
-                    "Tuesday": "11:00-22:30",
-                    "Wednesday": "11:00-23:00",
-                    "Thursday": "11:00-23:00",
-                    "Friday": "11:00-23:30",
-                    "Saturday": "10:00-23:30",
-                    "Sunday": "10:00-22:30"
-                }
-            ),
-            Restaurant(
-                id=15,
-                name="Andhra Spice",
-                cuisine="South Indian",
-                location="Uptown",
-                capacity=50,
-                amenities=["chilli challenge", "bar"],
-                rating=4.7,
-                price_range="₹300-₹6000",
-                opening_hours={
-                    "Monday": "11:00-23:00",
-                    "Tuesday": "11:00-23:00",
-                    "Wednesday": "11:00-23:30",
-                    "Thursday": "11:00-23:30",
-                    "Friday": "11:00-24:00",
-                    "Saturday": "10:00-24:00",
-                    "Sunday": "10:00-23:00"
-                }
-            ),
-            Restaurant(
-                id=16,
-                name="Flavours",
-                cuisine="North Indian",
-                location="Outskirts",
-                capacity=35,
-                amenities=["bamboo decor", "live music"],
-                rating=4.6,
-                price_range="₹350-₹5500",
-                opening_hours={
-                    "Monday": "11:00-22:00",
-                    "Tuesday": "11:00-22:00",
-                    "Wednesday": "11:00-22:30",
-                    "Thursday": "11:00-22:30",
-                    "Friday": "11:00-23:00",
-                    "Saturday": "10:00-23:00",
-                    "Sunday": "10:00-22:00"
-                }
-            ),
-            Restaurant(
-                id=17,
-                name="Tadka Tandoor",
-                cuisine="Multicuisine",
-                location="Downtown",
-                capacity=45,
-                amenities=["street food counter", "theater shows"],
-                rating=4.5,
-                price_range="₹200-₹4000",
-                opening_hours={
-                    "Monday": "11:00-22:30",
-                    "Tuesday": "11:00-22:30",
-                    "Wednesday": "11:00-23:00",
-                    "Thursday": "11:00-23:00",
-                    "Friday": "11:00-23:30",
-                    "Saturday": "10:00-23:30",
-                    "Sunday": "10:00-22:30"
-                }
-            ),
-            Restaurant(
-                id=18,
-                name="Fuel Blend",
-                cuisine="Multicuisine",
-                location="Midtown",
-                capacity=40,
-                amenities=["Western", "live cooking"],
-                rating=4.4,
-                price_range="₹300-₹5000",
-                opening_hours={
-                    "Monday": "11:00-23:00",
-                    "Tuesday": "11:00-23:00",
-                    "Wednesday": "11:00-23:30",
-                    "Thursday": "11:00-23:30",
-                    "Friday": "11:00-24:00",
-                    "Saturday": "10:00-24:00",
-                    "Sunday": "10:00-23:00"
-                }
-            ),
-            Restaurant(
-                id=19,
-                name="Grand Garden",
-                cuisine="North Indian",
-                location="Uptown",
-                capacity=50,
-                amenities=["temple style seating", "vegetarian only"],
-                rating=4.3,
-                price_range="₹150-₹3000",
-                opening_hours={
-                    "Monday": "07:00-22:00",
-                    "Tuesday": "07:00-22:00",
-                    "Wednesday": "07:00-22:30",
-                    "Thursday": "07:00-22:30",
-                    "Friday": "07:00-23:00",
-                    "Saturday": "07:00-23:00",
-                    "Sunday": "07:00-22:00"
-                }
-            ),
-            Restaurant(
-                id=20,
-                name="Malabari Coast",
-                cuisine="South Indian",
-                location="Outskirts",
-                capacity=60,
-                amenities=["beach view", "spice market"],
-                rating=4.7,
-                price_range="₹400-₹7000",
-                opening_hours={
-                    "Monday": "11:00-23:00",
-                    "Tuesday": "11:00-23:00",
-                    "Wednesday": "11:00-23:30",
-                    "Thursday": "11:00-23:30",
-                    "Friday": "11:00-24:00",
-                    "Saturday": "10:00-24:00",
-                    "Sunday": "10:00-23:00"
-                }
-            ),
-            Restaurant(
-                id=21,
-                name="Pahadi Dhaba",
-                cuisine="North Indian",
-                location="Downtown",
-                capacity=30,
-                amenities=["mountain decor", "fireplace"],
-                rating=4.5,
-                price_range="₹350-₹6000",
-                opening_hours={
-                    "Monday": "11:00-22:00",
-                    "Tuesday": "11:00-22:00",
-                    "Wednesday": "11:00-22:30",
-                    "Thursday": "11:00-22:30",
-                    "Friday": "11:00-23:00",
-                    "Saturday": "10:00-23:00",
-                    "Sunday": "10:00-22:00"
-                }
-            ),
-            Restaurant(
-                id=22,
-                name="Mewari Mahal",
-                cuisine="North Indian",
-                location="Midtown",
-                capacity=55,
-                amenities=["royal palace theme", "folk performances"],
-                rating=4.8,
-                price_range="₹500-₹9000",
-                opening_hours={
-                    "Monday": "11:00-23:00",
-                    "Tuesday": "11:00-23:00",
-                    "Wednesday": "11:00-23:30",
-                    "Thursday": "11:00-23:30",
-                    "Friday": "11:00-24:00",
-                    "Saturday": "10:00-24:00",
-                    "Sunday": "10:00-23:00"
-                }
-            ),
-            Restaurant(
-                id=23,
-                name="Chaat Corner",
-                cuisine="Multicuisine",
-                location="Uptown",
-                capacity=65,
-                amenities=["live counters", "outdoor seating"],
-                rating=4.2,
-                price_range="₹100-₹2000",
-                opening_hours={
-                    "Monday": "10:00-22:00",
-                    "Tuesday": "10:00-22:00",
-                    "Wednesday": "10:00-22:30",
-                    "Thursday": "10:00-22:30",
-                    "Friday": "10:00-23:00",
-                    "Saturday": "09:00-23:00",
-                    "Sunday": "09:00-22:00"
-                }
-            ),
-            Restaurant(
-                id=24,
-                name="Boat House",
-                cuisine="South Indian",
-                location="Outskirts",
-                capacity=40,
-                amenities=["backwater view", "boat dining"],
-                rating=4.6,
-                price_range="₹400-₹7500",
-                opening_hours={
-                    "Monday": "11:00-22:30",
-                    "Tuesday": "11:00-22:30",
-                    "Wednesday": "11:00-23:00",
-                    "Thursday": "11:00-23:00",
-                    "Friday": "11:00-23:30",
-                    "Saturday": "10:00-23:30",
-                    "Sunday": "10:00-22:30"
-                }
-            ),
-            Restaurant(
-                id=25,
-                name="Dilli 6",
-                cuisine="North Indian",
-                location="Downtown",
-                capacity=70,
-                amenities=["street theme", "live chaat counter"],
-                rating=4.9,
-                price_range="₹200-₹5000",
-                opening_hours={
-                    "Monday": "11:00-23:00",
-                    "Tuesday": "11:00-23:00",
-                    "Wednesday": "11:00-23:30",
-                    "Thursday": "11:00-23:30",
-                    "Friday": "11:00-24:00",
-                    "Saturday": "10:00-24:00",
-                    "Sunday": "10:00-23:00"
-                }
-            )
-        ]
-        return fixed_restaurants
+    # a full slot answers with this many nearest bookable times on this grid
+    SUGGESTION_COUNT = 5
+    SUGGESTION_MINUTES = 15
+    # similar restaurants offered when the requested one cannot take the party
+    ALTERNATIVE_COUNT = 3
+    # seconds between passes moving past-date bookings to the archive
+    ARCHIVE_INTERVAL = 3600
+    # longest date range find_restaurants checks availability over
+    MAX_RANGE_DAYS = 14
+    # most reservations list_reservations returns per page
+    MAX_PAGE_SIZE = 100
+
+    def __init__(self, storage: Optional[ReservationStorage] = None,
+                 id_generator: Optional[ReservationIdGenerator] = None,
+                 catalog: Optional[RestaurantCatalog] = None,
+                 archive: Optional[ReservationArchive] = None):
+        self.restaurants = catalog or RestaurantCatalog()
+        # reservation id -> Reservation for today and later, kept in booking order;
+        # past dates live in self.archive
+        self.reservations: Dict[str, Reservation] = {}
+        # bumped on every change to the book, so readers can skip work when it is unchanged
+        self.version = 0
+        self._snapshot: Optional[ReservationSnapshot] = None
+        # sort order -> (version, records in that order); (version, filters) -> matching records
+        self._orderings: Dict[str, Tuple[int, Tuple[Mapping, ...]]] = {}
+        self._listings: "OrderedDict[tuple, Tuple[Mapping, ...]]" = OrderedDict()
+        self.archive = archive or default_archive()
+        self._archived_at = 0.0
+        # seats in use per restaurant-day; the one capacity engine behind search and booking
+        self._occupancy = OccupancyEngine()
+        # normalized guest name -> (day, minute, reservation id) sorted by date and time
+        self._guests: Dict[str, List[Tuple[int, int, str]]] = {}
+        self.storage = storage or default_storage()
+        self.id_generator = id_generator or SequentialIdGenerator()
+        high_water = self.archive.high_water()
+        if high_water:
+            self.id_generator.observe(high_water)
+        # every check-and-write runs inside _write_session, which serializes writers
+        # in this process and, through storage.lock(), across worker processes; one
+        # store takes one writer at a time, so bookings are not sharded by slot
+        self._state_lock = threading.RLock()
+        self._load_reservations()
+        self.archive_past_reservations()
     
     def find_restaurants(self, cuisine: str = None, location: str = None, 
                         party_size: int = None, date: str = None, 
-                        time: str = None, amenities: List[str] = None) -> List[Dict]:
-        results = []
-        for restaurant in self.restaurants:
-            # Filter by criteria
-            if cuisine and restaurant.cuisine.lower() != cuisine.lower():
-                continue
-            if location and restaurant.location.lower() != location.lower():
-                continue
-            if amenities and not all(a.lower() in [am.lower() for am in restaurant.amenities] for a in amenities):
-                continue
-            
-            if party_size and restaurant.capacity < party_size:
+                        time: str = None, amenities: List[str] = None,
+                        open_now: bool = False, open_at: str = None,
+                        max_price: int = None, min_rating: float = None,
+                        sort_by: str = None, limit: int = None, date_to: str = None) -> Union[List[Dict], Dict]:
+        """Restaurants passing every given filter.
+
+        With `date` and `time` only venues with room for the party at that slot
+        are returned; `date_to` widens it to the same time on any day from
+        `date` through `date_to` (e.g. a weekend), listing the days in
+        `available_dates`.
+
+        `sort_by` ranks by "rating" (best first), "price" (cheapest first) or
+        "availability" (most free seats at date/time, else largest capacity);
+        catalog order otherwise. `limit` keeps only the top results.
+
+        A date or time that does not parse gives an error response rather than
+        results whose availability was never checked.
+        """
+        self._refresh()
+        slot_day = slot_minute = None
+        slot_days = []
+        if date and time:
+            try:
+                slot_day, last_day = _to_day(date), _to_day(date_to) if date_to else None
+            except (TypeError, ValueError):
+                return {"success": False, "error": "Please provide dates in YYYY-MM-DD format"}
+            try:
+                slot_minute = _to_minutes(time)
+            except (AttributeError, ValueError):
+                return {"success": False, "error": "Please provide the time in HH:MM format"}
+            last_day = slot_day if last_day is None else last_day
+            slot_days = list(range(slot_day, max(slot_day, min(last_day, slot_day + self.MAX_RANGE_DAYS - 1)) + 1))
+
+        # open_at is "YYYY-MM-DD HH:MM", or "HH:MM" on `date` (today if not given)
+        open_day = open_minute = None
+        if open_at:
+            on_date, _, at_time = open_at.strip().rpartition(" ")
+            try:
+                open_day = _to_day(on_date.strip() or date or datetime.now().date().isoformat())
+                open_minute = _to_minutes(at_time)
+            except ValueError:
+                return {"success": False, "error": "Please provide the opening time as YYYY-MM-DD HH:MM"}
+        elif open_now:
+            now = datetime.now()
+            open_day, open_minute = now.toordinal(), now.hour * 60 + now.minute
+
+        self.restaurants.refresh()
+        candidates = []
+        for restaurant_id in self.restaurants.match(cuisine=cuisine, location=location,
+                                                    amenities=amenities, min_capacity=party_size,
+                                                    max_price=max_price, min_rating=min_rating):
+            if open_minute is not None and not self.restaurants.is_open(restaurant_id, open_day, open_minute):
                 continue
-                
-            if date and time:
-                # availability check
-                reservation_count = sum(
-                    1 for r in self.reservations 
-                    if r.restaurant_id == restaurant.id 
-                    and r.date == date 
-                    and abs((datetime.strptime(r.time, "%H:%M") - datetime.strptime(time, "%H:%M")).total_seconds()) < 3600
+            candidates.append(restaurant_id)
+
+        available_on: Dict[int, List[int]] = {}
+        if slot_days:
+            # availability check: one vectorized pass over all candidates per day
+            catalog = self.restaurants
+            for day in slot_days:
+                open_ids = [r for r in candidates if catalog.is_open(r, day, slot_minute)]
+                fits = self._occupancy.fits_many(
+                    open_ids, day, slot_minute,
+                    [catalog.dining_duration(r) for r in open_ids],
+                    [catalog.capacity(r) for r in open_ids],
+                    party_size or 1
                 )
-                if reservation_count >= restaurant.capacity / 4:
-                    continue
-            
-            results.append({
-                "id": restaurant.id,
-                "name": restaurant.name,
-                "cuisine": restaurant.cuisine,
-                "location": restaurant.location,
-                "capacity": restaurant.capacity,
-                "amenities": restaurant.amenities,
-                "rating": restaurant.rating,
-                "price_range": restaurant.price_range,
-                "available": True
-            })
+                for restaurant_id, fit in zip(open_ids, fits):
+                    if fit:
+                        available_on.setdefault(restaurant_id, []).append(day)
+            candidates = [r for r in candidates if r in available_on]
+
+        # records are only materialized for the venues that make the cut
+        key = self._ranking_key(sort_by, slot_day, slot_minute)
+        if key:
+            ranked = heapq.nsmallest(limit, candidates, key=key) if limit else sorted(candidates, key=key)
+        else:
+            ranked = candidates[:limit] if limit else candidates
+
+        results = []
+        for restaurant_id in ranked:
+            result = self.restaurants.summary(restaurant_id)
+            if result is None:
+                continue
+            result["available"] = True
+            if len(slot_days) > 1:
+                result["available_dates"] = [datetime.fromordinal(day).date().isoformat() for day in available_on[restaurant_id]]
+            results.append(result)
         
         return results
+
+    def _ranking_key(self, sort_by: Optional[str], day: Optional[int], minute: Optional[int]):
+        catalog = self.restaurants
+        if sort_by == "rating":
+            return lambda restaurant_id: (-catalog.rating(restaurant_id), restaurant_id)
+        if sort_by == "price":
+            return lambda restaurant_id: (catalog.price(restaurant_id), restaurant_id)
+        if sort_by == "availability":
+            if minute is None:
+                return lambda restaurant_id: (-catalog.capacity(restaurant_id), restaurant_id)
+            return lambda restaurant_id: (
+                self._occupancy.peak(restaurant_id, day, minute, catalog.dining_duration(restaurant_id))
+                - catalog.capacity(restaurant_id),
+                restaurant_id
+            )
+        return None
     
+    def snapshot(self) -> ReservationSnapshot:
+        """Immutable copy of the current reservations, rebuilt only when `version` moved."""
+        self._refresh()
+        with self._state_lock:
+            if self._snapshot is None or self._snapshot.version != self.version:
+                self._snapshot = ReservationSnapshot(
+                    self.version,
+                    tuple(MappingProxyType(r.to_dict()) for r in self.reservations.values())
+                )
+            return self._snapshot
+
+    def list_reservations(self, offset: int = 0, limit: int = 20, date: str = None,
+                          restaurant_id: int = None, name: str = None, sort: str = "newest") -> Dict:
+        """One page of reservations, newest booking first or by date and time ("date").
+
+        Orderings and filtered listings are cached per `version`, so paging
+        through an unchanged book costs O(limit).
+        """
+        if sort not in ("newest", "date"):
+            return {"success": False, "error": "Sort must be 'newest' or 'date'"}
+        if date:
+            try:
+                _to_day(date)
+            except (TypeError, ValueError):
+                return {"success": False, "error": "Please provide the date in YYYY-MM-DD format"}
+        offset = max(0, int(offset or 0))
+        limit = max(1, min(int(limit or 20), self.MAX_PAGE_SIZE))
+
+        snapshot = self.snapshot()
+        key = (snapshot.version, sort, date, restaurant_id, _guest_key(name) if name else None)
+        with self._state_lock:
+            records = self._listings.get(key)
+            if records is None:
+                records = self._ordered(snapshot, sort)
+                if date or restaurant_id is not None or name:
+                    records = tuple(
+                        r for r in records
+                        if (not date or r["date"] == date)
+                        and (restaurant_id is None or r["restaurant_id"] == restaurant_id)
+                        and (not name or _guest_key(r["name"]) == key[4])
+                    )
+                self._listings[key] = records
+                # a handful of recent listings (e.g. the sidebar's current filters) is enough
+                while len(self._listings) > 8:
+                    self._listings.popitem(last=False)
+            else:
+                self._listings.move_to_end(key)
+
+        return {
+            "success": True,
+            "total": len(records),
+            "offset": offset,
+            "limit": limit,
+            "reservations": [dict(r) for r in records[offset:offset + limit]]
+        }
+
+    def _ordered(self, snapshot: ReservationSnapshot, sort: str) -> Tuple[Mapping, ...]:
+        # caller holds _state_lock; stable, so ties keep booking order
+        cached = self._orderings.get(sort)
+        if cached and cached[0] == snapshot.version:
+            return cached[1]
+        if sort == "date":
+            records = tuple(sorted(snapshot.reservations, key=lambda r: (str(r["date"]), str(r["time"]))))
+        else:
+            records = tuple(reversed(snapshot.reservations))
+        self._orderings[sort] = (snapshot.version, records)
+        return records
+
+    def restaurants_by_id(self) -> Mapping[int, Restaurant]:
+        self.restaurants.refresh()
+        return self.restaurants.by_id()
+
+    def resolve_restaurant_name(self, name: str) -> Optional[Dict]:
+        """Search result of the restaurant a typed name most likely refers to, or None.
+
+        Tolerates case, punctuation and spacing ("Boathouse", "Dilli-6") through
+        the catalog's name index; those set `exact`. A clear best match for a
+        small typo comes from the trigram index with `exact` False, and should
+        be confirmed with the guest before booking.
+        """
+        self.restaurants.refresh()
+        resolved = self.restaurants.resolve_name(name)
+        if resolved is None:
+            return None
+        result = self.restaurants.summary(resolved[0])
+        if result is not None:
+            result["exact"] = resolved[1]
+        return result
+
     def make_reservation(self, restaurant_id: int, name: str, party_size: int, 
                        date: str, time: str, special_requests: str = "") -> Dict:
         
-        # Validate all required parameters
+        error, restaurant, slot_day, slot_minute = self._validate_booking(restaurant_id, name, party_size, date, time)
+        if error:
+            return error
+        party_size = int(party_size)
+     
+        # reject full slots without waiting for the write path
+        self._refresh()
+        if not self._fits(restaurant_id, slot_day, slot_minute, party_size):
+            return self._slot_full_response(restaurant, slot_day, slot_minute, party_size)
+
+        with self._write_session():
+            # re-check now that bookings from other writers are merged in
+            if not self._fits(restaurant_id, slot_day, slot_minute, party_size):
+                return self._slot_full_response(restaurant, slot_day, slot_minute, party_size)
+
+            # Create reservation
+            reservation = Reservation(
+                id=self._new_reservation_id(),
+                restaurant_id=restaurant_id,
+                name=name,
+                party_size=party_size,
+                date=date,
+                time=time,
+                special_requests=special_requests
+            )
+            self.storage.insert(reservation.to_dict())
+            self.reservations[reservation.id] = reservation
+            self._index_reservation(reservation)
+        
+        return self._booking_confirmation(reservation, restaurant)
+
+    def get_availability(self, restaurant_id: int, date: str, slot_minutes: int = 30) -> Dict:
+        """Seats still free for a full sitting at every `slot_minutes` slot the restaurant is open on one day."""
+        self._refresh()
+        self.restaurants.refresh()
+        restaurant = self.restaurants.get(restaurant_id)
+        if not restaurant:
+            return {"success": False, "error": "Restaurant not found"}
+        try:
+            day = _to_day(date)
+        except (TypeError, ValueError):
+            return {"success": False, "error": "Please provide the date in YYYY-MM-DD format"}
+        if not slot_minutes or slot_minutes < SLOT_MINUTES:
+            return {"success": False, "error": f"Slot length must be at least {SLOT_MINUTES} minutes"}
+
+        # one prefix-sum sweep gives seats in use per bucket; a sitting starting at
+        # a slot needs the peak over its whole dining window
+        in_use = self._occupancy.profile(restaurant_id, day)
+        duration = restaurant.dining_duration
+        slots = []
+        for minute in range(0, 24 * 60, slot_minutes):
+            if not self.restaurants.is_open(restaurant.id, day, minute):
+                continue
+            lo, hi = to_buckets(minute, duration)
+            remaining = max(0, restaurant.capacity - max(in_use[lo:hi]))
+            slots.append({"time": f"{minute // 60:02d}:{minute % 60:02d}", "remaining": remaining})
+
+        return {
+            "success": True,
+            "restaurant_id": restaurant.id,
+            "restaurant_name": restaurant.name,
+            "date": date,
+            "slot_minutes": slot_minutes,
+            "available_times": [slot["time"] for slot in slots if slot["remaining"] > 0],
+            "slots": slots
+        }
+
+    def make_reservations_bulk(self, reservations: List[Dict]) -> Dict:
+        """Book a batch (group event or import) all-or-nothing with one storage write.
+
+        Each item takes the make_reservation arguments. `results` lines up with
+        the input; if any item is invalid or does not fit, nothing is booked.
+        """
+        bookings = []
+        results = []
+        for item in reservations:
+            error, restaurant, day, minute = self._validate_booking(
+                item.get("restaurant_id"), item.get("name"), item.get("party_size"),
+                item.get("date"), item.get("time")
+            )
+            if not error:
+                item = {**item, "party_size": int(item["party_size"])}
+            bookings.append((item, restaurant, day, minute))
+            results.append(error)
+        if not bookings:
+            return {"success": False, "error": "Please provide at least one reservation"}
+        if any(results):
+            return self._bulk_failure("make", results)
+
+        with self._write_session():
+            # earlier items of the batch hold their seats while later ones are checked
+            try:
+                for i, (item, restaurant, day, minute) in enumerate(bookings):
+                    if self._fits(restaurant.id, day, minute, item["party_size"]):
+                        self._occupancy.add(f"pending:{i}", restaurant.id, day, minute,
+                                            restaurant.dining_duration, item["party_size"])
+                    else:
+                        results[i] = self._slot_full_response(restaurant, day, minute, item["party_size"])
+            finally:
+                for i in range(len(bookings)):
+                    self._occupancy.remove(f"pending:{i}")
+            if any(results):
+                return self._bulk_failure("make", results)
+
+            created = []
+            issued = set()
+            for item, restaurant, day, minute in bookings:
+                reservation = Reservation(
+                    id=self._new_reservation_id(issued),
+                    restaurant_id=item["restaurant_id"],
+                    name=item["name"],
+                    party_size=item["party_size"],
+                    date=item["date"],
+                    time=item["time"],
+                    special_requests=item.get("special_requests", "")
+                )
+                issued.add(reservation.id)
+                created.append((reservation, restaurant))
+            self.storage.apply([("insert", reservation.to_dict()) for reservation, _ in created])
+            for reservation, _ in created:
+                self.reservations[reservation.id] = reservation
+                self._index_reservation(reservation)
+
+        return {
+            "success": True,
+            "message": f"{len(created)} reservations made",
+            "results": [self._booking_confirmation(reservation, restaurant) for reservation, restaurant in created]
+        }
+
+    def cancel_reservations_bulk(self, reservation_ids: List[str]) -> Dict:
+        # all-or-nothing like make_reservations_bulk
+        self._refresh()
+        if not reservation_ids:
+            return {"success": False, "error": "Please provide at least one reservation ID"}
+        with self._write_session():
+            targets = [self.reservations.get(reservation_id) for reservation_id in reservation_ids]
+            if not all(targets):
+                results = [None if r else {"success": False, "error": "Reservation not found"} for r in targets]
+                return self._bulk_failure("cancel", results)
+
+            unique = list({r.id: r for r in targets}.values())
+            self.storage.apply([("delete", {"id": r.id}) for r in unique])
+            for reservation in unique:
+                del self.reservations[reservation.id]
+                self._unindex_reservation(reservation)
+
+        return {
+            "success": True,
+            "message": f"{len(unique)} reservations canceled",
+            "results": [{"success": True, "reservation_id": r.id} for r in targets]
+        }
+
+    def archive_past_reservations(self) -> int:
+        """Move bookings dated before today from the store to the archive; returns how many."""
+        today = datetime.now().toordinal()
+        with self._write_session():
+            self._archived_at = monotonic()
+            past = [r for r in self.reservations.values() if isinstance(r.day, int) and r.day < today]
+            if not past:
+                return 0
+            # archive first: a crash in between leaves a duplicate the archive ignores, never a loss
+            self.archive.append([r.to_dict() for r in past])
+            # the store no longer shows these ids, so the archive remembers how far ids went
+            high_water = self.id_generator.high_water()
+            if high_water:
+                self.archive.record_high_water(high_water)
+            self.storage.apply([("delete", {"id": r.id}) for r in past])
+            for reservation in past:
+                del self.reservations[reservation.id]
+                self._unindex_reservation(reservation)
+        return len(past)
+
+    def find_reservations(self, name: str, date_from: str = None, date_to: str = None,
+                          include_past: bool = False) -> Dict:
+        """Upcoming bookings made under a guest name, in date order.
+
+        Served from the guest index with a binary search on the date range;
+        `include_past` adds matching bookings from the archive.
+        """
+        if not name or not str(name).strip():
+            return {"success": False, "error": "Please provide the name the reservations were made under"}
+        try:
+            first_day = _to_day(date_from) if date_from else None
+            last_day = _to_day(date_to) if date_to else None
+        except (TypeError, ValueError):
+            return {"success": False, "error": "Please provide dates in YYYY-MM-DD format"}
+
+        self._refresh()
+        with self._state_lock:
+            entries = self._guests.get(_guest_key(name), [])
+            lo = bisect.bisect_left(entries, (first_day,)) if first_day is not None else 0
+            hi = bisect.bisect_left(entries, (last_day + 1,)) if last_day is not None else len(entries)
+            found = [self.reservations[reservation_id].to_dict() for _, _, reservation_id in entries[lo:hi]]
+        if include_past:
+            found = self.archive.query(name=_guest_key(name), date_from=date_from, date_to=date_to) + found
+
+        for record in found:
+            restaurant = self.restaurants.get(record["restaurant_id"])
+            record["restaurant_name"] = restaurant.name if restaurant else None
+        return {"success": True, "count": len(found), "reservations": found}
+
+    def reservation_history(self, name: str = None, restaurant_id: int = None,
+                            date_from: str = None, date_to: str = None) -> Dict:
+        """Past reservations from the archive; only the months in range are read."""
+        for value in (date_from, date_to):
+            if value:
+                try:
+                    _to_day(value)
+                except (TypeError, ValueError):
+                    return {"success": False, "error": "Please provide dates in YYYY-MM-DD format"}
+        reservations = self.archive.query(name=name, restaurant_id=restaurant_id,
+                                          date_from=date_from, date_to=date_to)
+        return {"success": True, "count": len(reservations), "reservations": reservations}
+
+    def _bulk_failure(self, action: str, results: List[Optional[Dict]]) -> Dict:
+        failed = sum(1 for r in results if r)
+        return {
+            "success": False,
+            "error": f"No reservations were {'made' if action == 'make' else 'canceled'}: "
+                     f"{failed} of {len(results)} could not be processed",
+            "results": [r or {"success": False, "error": "Skipped because another item in the batch failed"} for r in results]
+        }
+
+    def _validate_booking(self, restaurant_id: int, name: str, party_size: int,
+                          date: str, time: str) -> Tuple[Optional[Dict], Optional[Restaurant], int, int]:
+        # returns (error response, restaurant, day ordinal, minute of day)
         if not name or name.strip() == "":
-            return {"success": False, "error": "Please provide a name for the reservation"}
+            return {"success": False, "error": "Please provide a name for the reservation"}, None, 0, 0
         
+        try:
+            party_size = int(party_size)
+        except (TypeError, ValueError):
+            party_size = 0
         if party_size <= 0:
-            return {"success": False, "error": "Party size must be at least 1"}
+            return {"success": False, "error": "Party size must be at least 1"}, None, 0, 0
         
         if not date or date.strip() == "":
-            return {"success": False, "error": "Please provide a reservation date"}
+            return {"success": False, "error": "Please provide a reservation date"}, None, 0, 0
         
         if not time or time.strip() == "":
-            return {"success": False, "error": "Please provide a reservation time"}
+            return {"success": False, "error": "Please provide a reservation time"}, None, 0, 0
+
+        try:
+            slot_day = _to_day(date)
+        except ValueError:
+            return {"success": False, "error": "Please provide the reservation date in YYYY-MM-DD format"}, None, 0, 0
+
+        if slot_day < datetime.now().toordinal():
+            return {"success": False, "error": "Reservations can only be made for today or a later date"}, None, 0, 0
+
+        try:
+            slot_minute = _to_minutes(time)
+        except ValueError:
+            return {"success": False, "error": "Please provide the reservation time in HH:MM format"}, None, 0, 0
         
-        restaurant = next((r for r in self.restaurants if r.id == restaurant_id), None)
+        self.restaurants.refresh()
+        restaurant = self.restaurants.get(restaurant_id)
         if not restaurant:
-            return {"success": False, "error": "Restaurant not found"}
+            return {"success": False, "error": "Restaurant not found"}, None, 0, 0
         
         if party_size > restaurant.capacity:
-            return {"success": False, "error": f"Party size exceeds restaurant capacity of {restaurant.capacity}, Book another restaurant."}
-     
-        overbooked = sum(
-            1 for r in self.reservations
-            if r.restaurant_id == restaurant_id and r.date == date
-            and abs((datetime.strptime(r.time, "%H:%M") - datetime.strptime(time, "%H:%M")).total_seconds()) < 3600
-        )
-
-        if overbooked >= restaurant.capacity // 4:
-            return {
-                "success": False,
-                "error": f"The time slot {time} is currently full. Please try a different time.",
-                "suggestions": [f"{hour:02d}:{minute:02d}" for hour in range(18, 22) for minute in [0, 30]]
-            }
-
-        # Generate reservation ID
-        reservation_id = f"RES-{random.randint(10000, 99999)}"
-        
-        # Create reservation
-        reservation = Reservation(
-            id=reservation_id,
-            restaurant_id=restaurant_id,
-            name=name,
-            party_size=party_size,
-            date=date,
-            time=time,
-            special_requests=special_requests
-        )
-        self.reservations.append(reservation)
-        self._save_reservations_to_file()
-        
+            return {"success": False, "error": f"Party size exceeds restaurant capacity of {restaurant.capacity}, Book another restaurant."}, None, 0, 0
+
+        if not self.restaurants.is_open(restaurant.id, slot_day, slot_minute):
+            return self._closed_response(restaurant, slot_day, time), None, 0, 0
+
+        return None, restaurant, slot_day, slot_minute
+
+    def _new_reservation_id(self, taken: Set[str] = frozenset()) -> str:
+        # caller holds the write session; `taken` covers ids issued earlier in the same batch
+        reservation_id = self.id_generator.next_id()
+        while reservation_id in self.reservations or reservation_id in taken:
+            reservation_id = self.id_generator.next_id()
+        return reservation_id
+
+    def _booking_confirmation(self, reservation: Reservation, restaurant: Restaurant) -> Dict:
         return {
             "success": True,
-            "reservation_id": reservation_id,
+            "reservation_id": reservation.id,
             "restaurant_name": restaurant.name,
-            "date": date,
-            "time": time,
-            "party_size": party_size
+            "date": reservation.date,
+            "time": reservation.time,
+            "party_size": reservation.party_size
+        }
+
+    def _closed_response(self, restaurant: Restaurant, day: int, time: str) -> Dict:
+        weekday = WEEKDAYS[weekday_of(day)]
+        hours = restaurant.opening_hours.get(weekday) or "Closed"
+        return {
+            "success": False,
+            "error": f"{restaurant.name} is closed at {time} on {weekday}. Opening hours that day: {hours}."
         }
-    
-    def _load_reservations_from_file(self):
-        if os.path.exists(self.reservation_file):
-            try:
-                with open(self.reservation_file, "r") as f:
-                    content = f.read().strip()
-                    if not content:
-                        self.reservations = []
-                        return
-                    data = json.loads(content)
-                    self.reservations = [Reservation(**r) for r in data]
-            except Exception as e:
-                self.reservations = []
-        else:
-            self._save_reservations_to_file()
 
+    def _slot_full_response(self, restaurant: Restaurant, day: int, minute: int, party_size: int) -> Dict:
+        return {
+            "success": False,
+            "error": f"The time slot {minute // 60:02d}:{minute % 60:02d} is currently full. Please try a different time.",
+            "suggestions": self._nearest_free_slots(restaurant, day, minute, party_size),
+            "alternatives": self._alternative_venues(restaurant, day, minute, party_size)
+        }
+
+    def _alternative_venues(self, restaurant: Restaurant, day: int, minute: int, party_size: int) -> List[Dict]:
+        # one pass over the catalog's precomputed neighbors, most similar first
+        alternatives = []
+        for restaurant_id in self.restaurants.similar(restaurant.id):
+            if self.restaurants.capacity(restaurant_id) < party_size:
+                continue
+            if not self.restaurants.is_open(restaurant_id, day, minute):
+                continue
+            if not self._fits(restaurant_id, day, minute, party_size):
+                continue
+            venue = self.restaurants.get(restaurant_id)
+            alternatives.append({
+                "id": venue.id,
+                "name": venue.name,
+                "cuisine": venue.cuisine,
+                "location": venue.location,
+                "rating": venue.rating,
+                "price_range": venue.price_range
+            })
+            if len(alternatives) == self.ALTERNATIVE_COUNT:
+                break
+        return alternatives
 
-    def _save_reservations_to_file(self):
-        with open(self.reservation_file, "w") as f:
-            json.dump([r.__dict__ for r in self.reservations], f, indent=2)
+    def _nearest_free_slots(self, restaurant: Restaurant, day: int, minute: int, party_size: int) -> List[Dict]:
+        # walk the suggestion grid outward from the requested time, up to a day either
+        # side, keeping open slots that fit; each check is an O(log n) peak query
+        step = self.SUGGESTION_MINUTES
+        requested = day * 24 * 60 + minute
+        now = datetime.now()
+        earliest = now.toordinal() * 24 * 60 + now.hour * 60 + now.minute
+        base = requested - requested % step
+        candidates = sorted(range(base - 24 * 60, base + 24 * 60 + step, step),
+                            key=lambda t: (abs(t - requested), t))
+        suggestions = []
+        for t in candidates:
+            if t == requested or t < earliest:
+                continue
+            slot_day, slot_minute = divmod(t, 24 * 60)
+            if not self.restaurants.is_open(restaurant.id, slot_day, slot_minute):
+                continue
+            if not self._fits(restaurant.id, slot_day, slot_minute, party_size):
+                continue
+            suggestions.append({
+                "date": date.fromordinal(slot_day).isoformat(),
+                "time": f"{slot_minute // 60:02d}:{slot_minute % 60:02d}"
+            })
+            if len(suggestions) == self.SUGGESTION_COUNT:
+                break
+        return suggestions
     
+    @contextmanager
+    def _write_session(self):
+        # serializes writers in this process (_state_lock) and across worker
+        # processes (storage.lock()), after catching up with their changes
+        with self._state_lock, self.storage.lock():
+            self._sync(locked=True)
+            yield
+
+    def _refresh(self):
+        # cheap staleness check so this worker sees bookings made by other processes
+        with self._state_lock:
+            self._sync()
+        if monotonic() - self._archived_at >= self.ARCHIVE_INTERVAL:
+            self.archive_past_reservations()
+
+    def _sync(self, locked: bool = False):
+        # caller holds _state_lock; `locked` says whether storage.lock() is held too
+        changes = self.storage.poll()
+        if changes is None:
+            if locked:
+                self._reload_reservations()
+            else:
+                with self.storage.lock():
+                    self._reload_reservations()
+        elif changes:
+            self._apply_changes(changes)
+
+    def _load_reservations(self):
+        with self._state_lock, self.storage.lock():
+            self._reload_reservations()
+
+    def _reload_reservations(self):
+        try:
+            self.reservations = {r["id"]: Reservation(**r) for r in self.storage.load()}
+        except Exception as e:
+            self.reservations = {}
+        for reservation_id in self.reservations:
+            self.id_generator.observe(reservation_id)
+        self._rebuild_indexes()
+
+    def _apply_changes(self, changes: List[Tuple[str, Dict]]):
+        # merge row-level changes written by another process
+        for op, record in changes:
+            existing = self.reservations.get(record["id"])
+            if existing:
+                self._unindex_reservation(existing)
+            if op == "delete":
+                self.reservations.pop(record["id"], None)
+                continue
+            reservation = Reservation(**record)
+            self.reservations[reservation.id] = reservation
+            self.id_generator.observe(reservation.id)
+            self._index_reservation(reservation)
+
+    def _rebuild_indexes(self):
+        self.version += 1
+        self._occupancy.clear()
+        self._guests.clear()
+        for reservation in self.reservations.values():
+            self._index_reservation(reservation)
+
+    @staticmethod
+    def _guest_entry(reservation: Reservation) -> Tuple[int, int, str]:
+        # legacy rows with unparseable dates sort first
+        return (reservation.day if isinstance(reservation.day, int) else 0,
+                reservation.minute if isinstance(reservation.minute, int) else 0,
+                reservation.id)
+
+    def _index_reservation(self, reservation: Reservation):
+        self.version += 1
+        bisect.insort(self._guests.setdefault(_guest_key(reservation.name), []), self._guest_entry(reservation))
+        if not isinstance(reservation.day, int) or not isinstance(reservation.minute, int):
+            # unparseable dates/times can never collide with a valid slot
+            return
+        try:
+            seats = int(reservation.party_size)
+        except (TypeError, ValueError):
+            return
+        self._occupancy.add(reservation.id, reservation.restaurant_id, reservation.day, reservation.minute,
+                            self.restaurants.dining_duration(reservation.restaurant_id), seats)
+
+    def _unindex_reservation(self, reservation: Reservation):
+        self.version += 1
+        self._occupancy.remove(reservation.id)
+        key = _guest_key(reservation.name)
+        entries = self._guests.get(key)
+        if entries:
+            entry = self._guest_entry(reservation)
+            at = bisect.bisect_left(entries, entry)
+            if at < len(entries) and entries[at] == entry:
+                del entries[at]
+            if not entries:
+                del self._guests[key]
+
+    def _fits(self, restaurant_id: int, day: int, minute: int, party_size: int) -> bool:
+        # can `party_size` more seats be held for a full sitting starting at `minute`
+        return self._occupancy.can_fit(restaurant_id, day, minute, self.restaurants.dining_duration(restaurant_id),
+                                       party_size, self.restaurants.capacity(restaurant_id))
+
     def modify_reservation(self, reservation_id: str, updates: dict) -> dict:
-        reservation = next((r for r in self.reservations if r.id == reservation_id), None)
-        if not reservation:
-            return {"success": False, "error": "Reservation not found"}
-        
-        for key, value in updates.items():
-            if hasattr(reservation, key):
-                setattr(reservation, key, value)
-        
-        self._save_reservations_to_file()
+        self._refresh()
+        changes = {key: value for key, value in updates.items() if key in RESERVATION_FIELDS and key != "id"}
+        if "date" in changes:
+            try:
+                _to_day(changes["date"])
+            except (TypeError, ValueError):
+                return {"success": False, "error": "Please provide the reservation date in YYYY-MM-DD format"}
+        if "time" in changes:
+            try:
+                _to_minutes(changes["time"])
+            except (AttributeError, ValueError):
+                return {"success": False, "error": "Please provide the reservation time in HH:MM format"}
+        if "party_size" in changes:
+            try:
+                changes["party_size"] = int(changes["party_size"])
+            except (TypeError, ValueError):
+                return {"success": False, "error": "Party size must be at least 1"}
+
+        with self._write_session():
+            reservation = self.reservations.get(reservation_id)
+            if not reservation:
+                return {"success": False, "error": "Reservation not found"}
+            updated = Reservation(**{**reservation.to_dict(), **changes})
+
+            # the booking's own seats must not count against its new slot
+            self._unindex_reservation(reservation)
+            try:
+                error = None
+                if changes.keys() & {"restaurant_id", "party_size", "date", "time"}:
+                    error, restaurant, day, minute = self._validate_booking(
+                        updated.restaurant_id, updated.name, updated.party_size, updated.date, updated.time
+                    )
+                    if not error and not self._fits(restaurant.id, day, minute, updated.party_size):
+                        error = self._slot_full_response(restaurant, day, minute, updated.party_size)
+                if not error:
+                    self.storage.update(updated.to_dict())
+            except Exception:
+                self._index_reservation(reservation)
+                raise
+            if error:
+                self._index_reservation(reservation)
+                return error
+            self.reservations[reservation_id] = updated
+            self._index_reservation(updated)
 
         return {
             "success": True,
             "message": "Reservation updated",
-            "updated": reservation.__dict__
+            "updated": updated.to_dict()
         }
 
     def cancel_reservation(self, reservation_id: str) -> Dict:
-        original_len = len(self.reservations)
-        self.reservations = [r for r in self.reservations if r.id != reservation_id]
-        if len(self.reservations) == original_len:
-            return {"success": False, "error": "Reservation not found"}
+        self._refresh()
+        with self._write_session():
+            reservation = self.reservations.get(reservation_id)
+            if not reservation:
+                return {"success": False, "error": "Reservation not found"}
 
-        self._save_reservations_to_file()
+            self.storage.delete(reservation_id)
+            del self.reservations[reservation_id]
+            self._unindex_reservation(reservation)
         return {"success": True, "message": "Reservation canceled"}
@@ -0,0 +1,211 @@
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from catalog import RestaurantCatalog
+
+_RESERVATION_ID = re.compile(r"\bRES-[0-9A-Z]+\b", re.IGNORECASE)
+_CANCEL = re.compile(r"\b(cancel|delete|remove|drop)\b", re.IGNORECASE)
+_MODIFY = re.compile(r"\b(change|modify|move|update|reschedule|shift|make it)\b", re.IGNORECASE)
+_LIST = re.compile(r"\b(restaurants?|places|options|show|list|recommend|suggest|find|available|any)\b", re.IGNORECASE)
+_NEGATION = re.compile(r"\b(don'?t|do not|not|never|no)\b", re.IGNORECASE)
+# booking words, numbers and loose dates need real extraction, so listings with them go to the LLM
+_BOOKING = re.compile(r"\b(book|reserve|reservation|table|tonight|tomorrow|today)\b|\d", re.IGNORECASE)
+_LOOSE_DATE = re.compile(
+    r"\b(today|tonight|tomorrow|monday|tuesday|wednesday|thursday|friday|saturday|sunday|"
+    r"jan(uary)?|feb(ruary)?|mar(ch)?|apr(il)?|may|june?|july?|aug(ust)?|sep(tember)?|oct(ober)?|"
+    r"nov(ember)?|dec(ember)?|next|this)\b",
+    re.IGNORECASE
+)
+_ISO_DATE = re.compile(r"\b(\d{4}-\d{2}-\d{2})\b")
+_TIME = re.compile(r"\b(\d{1,2})(?::(\d{2}))?\s*(am|pm)\b|\b(\d{1,2}):(\d{2})\b", re.IGNORECASE)
+# a question ("how do I cancel ...?") asks about an action rather than ordering it
+_QUESTION = re.compile(
+    r"\?|^\W*(how|what|why|when|where|which|who|can|could|would|should|will|shall|is|are|do|does|did)\b",
+    re.IGNORECASE
+)
+_WORD = re.compile(r"[a-z]+(?:'[a-z]+)?|\d+", re.IGNORECASE)
+# words a command may carry without changing what it asks for; anything else a
+# rule did not consume (a restaurant, a name, an amenity, "book") goes to the LLM
+_FILLER = frozenset(
+    "please pls kindly just the a an my our this that it i i'd i'm we want wanna like need "
+    "to for at on and reservation reservations booking bookings id number".split()
+)
+_MODIFY_FILLER = _FILLER | {"time", "date", "day", "party", "size", "instead", "of", "from"}
+_LISTING_FILLER = _FILLER | {"me", "us", "some", "in", "near", "around", "food", "cuisine", "area", "with"}
+_PARTY = re.compile(
+    r"\b(?:for|to)\s+(\d{1,3})\s*(?:people|persons|guests|pax|diners)\b|\bparty(?:\s+size)?(?:\s+of|\s+to)?\s+(\d{1,3})\b",
+    re.IGNORECASE
+)
+
+
+@dataclass
+class Route:
+    intent: str
+    tool: str
+    parameters: Dict
+    confidence: float
+    rule: str
+
+
+@dataclass
+class RouterMetrics:
+    messages: int = 0
+    routed: int = 0
+    by_rule: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def hit_rate(self) -> float:
+        return self.routed / self.messages if self.messages else 0.0
+
+
+class IntentRouter:
+    """Rule and lexicon router that settles obvious commands without the LLM.
+
+    Handles cancel/modify by reservation id and restaurant listings by
+    location or cuisine. Anything ambiguous (negations, loose dates,
+    several candidates, questions, or words the rule did not consume)
+    scores below `threshold` and is left to the LLM. The cuisine/location
+    lexicon follows the catalog across reloads.
+    """
+
+    def __init__(self, catalog: RestaurantCatalog, threshold: float = 0.8):
+        self.catalog = catalog
+        self.threshold = threshold
+        self.metrics = RouterMetrics()
+        self._lock = threading.Lock()
+        self._lexicon_version = None
+        self._cuisines: Dict[str, re.Pattern] = {}
+        self._locations: Dict[str, re.Pattern] = {}
+
+    def route(self, message: str) -> Optional[Route]:
+        route = None
+        for rule in (self._cancel, self._modify, self._listing):
+            candidate = rule(message)
+            if candidate:
+                route = candidate
+                break
+        if route and route.confidence < self.threshold:
+            route = None
+        with self._lock:
+            self.metrics.messages += 1
+            if route:
+                self.metrics.routed += 1
+                self.metrics.by_rule[route.rule] = self.metrics.by_rule.get(route.rule, 0) + 1
+        return route
+
+    def _cancel(self, message: str) -> Optional[Route]:
+        if not _CANCEL.search(message):
+            return None
+        ids = list(dict.fromkeys(match.upper() for match in _RESERVATION_ID.findall(message)))
+        if not ids:
+            return None
+        rest = _CANCEL.sub(" ", _RESERVATION_ID.sub(" ", message))
+        ambiguous = (_NEGATION.search(message) or _MODIFY.search(message) or _QUESTION.search(message)
+                     or self._unparsed(rest, _FILLER))
+        confidence = 0.5 if ambiguous else 0.95
+        if len(ids) == 1:
+            return Route("cancel_reservation", "cancel_reservation", {"reservation_id": ids[0]}, confidence, "cancel")
+        return Route("cancel_reservation", "cancel_reservations_bulk", {"reservation_ids": ids}, confidence, "cancel")
+
+    def _modify(self, message: str) -> Optional[Route]:
+        if not _MODIFY.search(message) or _CANCEL.search(message):
+            return None
+        ids = {match.upper() for match in _RESERVATION_ID.findall(message)}
+        if len(ids) != 1:
+            return None
+        # reservation ids contain digits, keep them away from the time/party parsers
+        text = _RESERVATION_ID.sub(" ", message)
+        updates = {}
+        confidence = 0.9
+
+        dates = set(_ISO_DATE.findall(text))
+        if len(dates) == 1:
+            updates["date"] = dates.pop()
+        elif dates:
+            confidence = 0.5
+        text = _ISO_DATE.sub(" ", text)
+        if _LOOSE_DATE.search(text):
+            confidence = 0.5
+
+        times = list(_TIME.finditer(text))
+        if len(times) > 1:
+            # "change time to 9pm instead of 8pm": the one after "to" is the new time
+            times = [t for t in times if re.search(r"\bto\s*$", text[:t.start()], re.IGNORECASE)]
+            if len(times) != 1:
+                confidence = 0.5
+        if len(times) == 1:
+            parsed = self._parse_time(times[0])
+            if parsed is None:
+                confidence = 0.5
+            else:
+                updates["time"] = parsed
+        text = _TIME.sub(" ", text)
+
+        parties = {int(a or b) for a, b in _PARTY.findall(text)}
+        if len(parties) == 1:
+            updates["party_size"] = parties.pop()
+        elif parties:
+            confidence = 0.5
+        text = _PARTY.sub(" ", text)
+
+        if not updates:
+            return None
+        # "to Boat House", "under the name Priya": changes this rule cannot carry
+        if _NEGATION.search(message) or _QUESTION.search(message) or self._unparsed(_MODIFY.sub(" ", text), _MODIFY_FILLER):
+            confidence = 0.5
+        return Route("modify_reservation", "modify_reservation",
+                     {"reservation_id": ids.pop(), "updates": updates}, confidence, "modify")
+
+    def _listing(self, message: str) -> Optional[Route]:
+        if not _LIST.search(message) or _BOOKING.search(message) or _RESERVATION_ID.search(message):
+            return None
+        self._refresh_lexicon()
+        cuisines = [term for term, pattern in self._cuisines.items() if pattern.search(message)]
+        locations = [term for term, pattern in self._locations.items() if pattern.search(message)]
+        if not cuisines and not locations:
+            return None
+        parameters = {}
+        if cuisines:
+            parameters["cuisine"] = cuisines[0]
+        if locations:
+            parameters["location"] = locations[0]
+        rest = _LIST.sub(" ", message)
+        for term in cuisines + locations:
+            rest = (self._cuisines.get(term) or self._locations[term]).sub(" ", rest)
+        # an amenity, price or rating filter left over would be silently dropped
+        ambiguous = (len(cuisines) > 1 or len(locations) > 1 or _NEGATION.search(message)
+                     or self._unparsed(rest, _LISTING_FILLER))
+        return Route("find_restaurants", "find_restaurants", parameters, 0.5 if ambiguous else 0.9, "listing")
+
+    def _refresh_lexicon(self):
+        if self._lexicon_version == self.catalog.version:
+            return
+        self._cuisines = {term: self._phrase(term) for term in self.catalog.terms("cuisine")}
+        self._locations = {term: self._phrase(term) for term in self.catalog.terms("location")}
+        self._lexicon_version = self.catalog.version
+
+    @staticmethod
+    def _unparsed(text: str, filler: frozenset) -> List[str]:
+        # words of `text` (what is left after a rule's matches) that are not filler
+        return [word for word in _WORD.findall(text.lower()) if word not in filler]
+
+    @staticmethod
+    def _phrase(term: str) -> re.Pattern:
+        # whole words, any spacing or hyphenation: "north-indian" finds "north indian"
+        return re.compile(r"\b" + r"[\s-]*".join(re.escape(word) for word in term.split()) + r"\b", re.IGNORECASE)
+
+    @staticmethod
+    def _parse_time(match: re.Match) -> Optional[str]:
+        hour, minute, meridiem, hour24, minute24 = match.groups()
+        if meridiem:
+            hour, minute = int(hour), int(minute or 0)
+            if not 1 <= hour <= 12:
+                return None
+            hour = hour % 12 + (12 if meridiem.lower() == "pm" else 0)
+        else:
+            hour, minute = int(hour24), int(minute24)
+        if hour > 23 or minute > 59:
+            return None
+        return f"{hour:02d}:{minute:02d}"
@@ -0,0 +1,385 @@
+import json
+import os
+import sqlite3
+import sys
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    # no advisory locks on Windows; a single worker process is assumed there
+    fcntl = None
+
+RESERVATION_FIELDS = ["id", "restaurant_id", "name", "party_size", "date", "time", "special_requests"]
+
+# a change is ("insert" | "update" | "delete", record); deletes only need {"id": ...}
+Change = Tuple[str, Dict]
+
+
+def _fsync_directory(path: str):
+    # persist a rename inside the directory holding `path`; not possible on Windows
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class ReservationStorage:
+    """Persistence backend for RestaurantDB.
+
+    Backends receive row-level changes so they can write only what changed;
+    `apply` must persist the whole batch or nothing. Several worker processes
+    may share one store: writers hold `lock()` and call `poll()` first so
+    they write on top of the latest generation.
+    """
+
+    lock_path: Optional[str] = None
+
+    @contextmanager
+    def lock(self):
+        # a fresh open file description per call, so flock also excludes other threads
+        if fcntl is None or self.lock_path is None:
+            yield
+            return
+        with open(self.lock_path, "a") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def poll(self) -> Optional[List[Change]]:
+        """Changes written by other processes since the last load/poll/apply.
+
+        Returns [] when nothing changed and None when the caller must `load()`
+        from scratch.
+        """
+        return []
+
+    def load(self) -> List[Dict]:
+        raise NotImplementedError
+
+    def apply(self, changes: List[Change]):
+        raise NotImplementedError
+
+    def insert(self, record: Dict):
+        self.apply([("insert", record)])
+
+    def update(self, record: Dict):
+        self.apply([("update", record)])
+
+    def delete(self, reservation_id: str):
+        self.apply([("delete", {"id": reservation_id})])
+
+    def close(self):
+        pass
+
+
+class JSONStorage(ReservationStorage):
+    # whole-file backend, fine for demos but every write is O(total bookings)
+    def __init__(self, path: str = "reservations.json"):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        # bumped by every snapshot write; inodes are recycled across os.replace and a
+        # same-size rewrite can keep the mtime, so stat alone can miss a foreign write
+        self.generation_path = f"{path}.generation"
+        self._records: Dict[str, Dict] = {}
+        self._file_version = None
+
+    def _read_generation(self) -> int:
+        try:
+            with open(self.generation_path, "r") as f:
+                return int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _stat_version(self):
+        # the generation catches our writers; stat still catches edits made by hand
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (self._read_generation(), st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def poll(self) -> Optional[List[Change]]:
+        return [] if self._stat_version() == self._file_version else None
+
+    def load(self) -> List[Dict]:
+        self._records = {}
+        if not os.path.exists(self.path):
+            self._write()
+            return []
+        try:
+            with open(self.path, "r") as f:
+                content = f.read().strip()
+            data = json.loads(content) if content else []
+        except Exception:
+            data = []
+        self._file_version = self._stat_version()
+        self._records = {r["id"]: r for r in data}
+        return list(self._records.values())
+
+    def apply(self, changes: List[Change]):
+        self._apply_in_memory(changes)
+        self._write()
+
+    def _apply_in_memory(self, changes: List[Change]):
+        for op, record in changes:
+            if op == "delete":
+                self._records.pop(record["id"], None)
+            else:
+                self._records[record["id"]] = dict(record)
+
+    def _write(self):
+        # write to a temp file and swap it in so readers never see a partial file;
+        # both are made durable before returning, since compact() drops the journal next
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(list(self._records.values()), f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        _fsync_directory(self.path)
+        # callers hold lock(), so the read-and-bump cannot race another writer
+        with open(f"{self.generation_path}.tmp", "w") as f:
+            f.write(str(self._read_generation() + 1))
+        os.replace(f"{self.generation_path}.tmp", self.generation_path)
+        self._file_version = self._stat_version()
+
+
+class JournalStorage(JSONStorage):
+    """Snapshot file plus an append-only change log.
+
+    Each `apply` appends a single JSON line and fsyncs it, so write cost
+    follows the size of the change. Startup replays the log on top of the
+    snapshot; once the log grows past `compact_threshold` bytes it is folded
+    back into the snapshot. Replay is idempotent, so a crash between writing
+    the snapshot and truncating the log is harmless.
+    """
+
+    def __init__(self, path: str = "reservations.json", journal_path: str = None,
+                 compact_threshold: int = 1024 * 1024):
+        super().__init__(path)
+        self.journal_path = journal_path or f"{os.path.splitext(path)[0]}.journal"
+        self.compact_threshold = compact_threshold
+        self._journal = None
+        # bytes of the journal already folded into _records
+        self._journal_offset = 0
+
+    def load(self) -> List[Dict]:
+        super().load()
+        self._journal_offset = 0
+        self._replay()
+        if self._journal is None:
+            self._journal = open(self.journal_path, "ab")
+        return list(self._records.values())
+
+    def _read_journal(self) -> Tuple[List[Change], bool]:
+        # complete lines after _journal_offset, and whether a torn line follows them
+        changes: List[Change] = []
+        if not os.path.exists(self.journal_path):
+            return changes, False
+        with open(self.journal_path, "rb") as f:
+            f.seek(self._journal_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    return changes, True
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    return changes, True
+                changes.extend(entry["changes"])
+                self._journal_offset += len(line)
+        return changes, False
+
+    def _replay(self):
+        changes, torn = self._read_journal()
+        self._apply_in_memory(changes)
+        if torn:
+            # torn tail from a crash mid-append; only safe to cut while holding lock()
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(self._journal_offset)
+
+    def poll(self) -> Optional[List[Change]]:
+        # a compaction swaps the snapshot, which forces a full reload
+        if self._stat_version() != self._file_version:
+            return None
+        try:
+            size = os.path.getsize(self.journal_path)
+        except FileNotFoundError:
+            size = 0
+        if size == self._journal_offset:
+            return []
+        if size < self._journal_offset:
+            return None
+        changes, _ = self._read_journal()
+        self._apply_in_memory(changes)
+        return changes
+
+    def apply(self, changes: List[Change]):
+        if self._journal is None:
+            self._journal = open(self.journal_path, "ab")
+        self._journal.write((json.dumps({"changes": changes}) + "\n").encode("utf-8"))
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._journal_offset = self._journal.tell()
+        self._apply_in_memory(changes)
+        if self._journal_offset >= self.compact_threshold:
+            self.compact()
+
+    def compact(self):
+        self._write()
+        self._journal.truncate(0)
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._journal_offset = 0
+
+    def close(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+
+class SQLiteStorage(ReservationStorage):
+    # changelog rows kept for poll(); workers further behind do a full reload
+    CHANGELOG_RETENTION = 10000
+
+    def __init__(self, path: str = "reservations.db"):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self._generation = 0
+        # the agent is shared across Streamlit session threads
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS reservations (
+                    id TEXT PRIMARY KEY,
+                    restaurant_id INTEGER NOT NULL,
+                    name TEXT NOT NULL,
+                    party_size INTEGER NOT NULL,
+                    date TEXT NOT NULL,
+                    time TEXT NOT NULL,
+                    special_requests TEXT NOT NULL DEFAULT ''
+                )"""
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_reservations_slot "
+                "ON reservations (restaurant_id, date, time)"
+            )
+            # one row per written reservation; the max generation is the store version
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS reservation_changes (
+                    generation INTEGER PRIMARY KEY AUTOINCREMENT,
+                    reservation_id TEXT NOT NULL
+                )"""
+            )
+
+    def _latest_generation(self) -> int:
+        return self._conn.execute("SELECT COALESCE(MAX(generation), 0) FROM reservation_changes").fetchone()[0]
+
+    def _select(self, where: str = "", params: Tuple = ()) -> List[Dict]:
+        rows = self._conn.execute(
+            f"SELECT {', '.join(RESERVATION_FIELDS)} FROM reservations {where} ORDER BY rowid", params
+        ).fetchall()
+        return [dict(zip(RESERVATION_FIELDS, row)) for row in rows]
+
+    def load(self) -> List[Dict]:
+        # read the rows and the generation from one consistent snapshot
+        self._conn.execute("BEGIN")
+        try:
+            records = self._select()
+            self._generation = self._latest_generation()
+        finally:
+            self._conn.execute("COMMIT")
+        return records
+
+    def poll(self) -> Optional[List[Change]]:
+        if self._latest_generation() == self._generation:
+            return []
+        self._conn.execute("BEGIN")
+        try:
+            latest = self._latest_generation()
+            oldest = self._conn.execute("SELECT MIN(generation) FROM reservation_changes").fetchone()[0]
+            if oldest is None or oldest > self._generation + 1:
+                return None
+            changed_ids = [row[0] for row in self._conn.execute(
+                "SELECT reservation_id FROM reservation_changes WHERE generation > ? "
+                "GROUP BY reservation_id ORDER BY MIN(generation)",
+                (self._generation,)
+            )]
+            current = {}
+            for i in range(0, len(changed_ids), 500):
+                chunk = changed_ids[i:i + 500]
+                for record in self._select(f"WHERE id IN ({', '.join('?' for _ in chunk)})", tuple(chunk)):
+                    current[record["id"]] = record
+            self._generation = latest
+        finally:
+            self._conn.execute("COMMIT")
+        return [
+            ("update", current[rid]) if rid in current else ("delete", {"id": rid})
+            for rid in changed_ids
+        ]
+
+    def apply(self, changes: List[Change]):
+        columns = ", ".join(RESERVATION_FIELDS)
+        placeholders = ", ".join("?" for _ in RESERVATION_FIELDS)
+        assignments = ", ".join(f"{field} = ?" for field in RESERVATION_FIELDS[1:])
+        with self._conn:
+            for op, record in changes:
+                if op == "insert":
+                    self._conn.execute(
+                        f"INSERT INTO reservations ({columns}) VALUES ({placeholders})",
+                        [record.get(field, "") for field in RESERVATION_FIELDS]
+                    )
+                elif op == "update":
+                    self._conn.execute(
+                        f"UPDATE reservations SET {assignments} WHERE id = ?",
+                        [record.get(field, "") for field in RESERVATION_FIELDS[1:]] + [record["id"]]
+                    )
+                elif op == "delete":
+                    self._conn.execute("DELETE FROM reservations WHERE id = ?", (record["id"],))
+                self._conn.execute(
+                    "INSERT INTO reservation_changes (reservation_id) VALUES (?)", (record["id"],)
+                )
+            # callers hold lock() and have polled, so nothing newer than this is unseen
+            self._generation = self._latest_generation()
+            self._conn.execute(
+                "DELETE FROM reservation_changes WHERE generation <= ?",
+                (self._generation - self.CHANGELOG_RETENTION,)
+            )
+
+    def migrate_from_json(self, json_path: str = "reservations.json") -> int:
+        # one-shot import; refuses to run against a store that already has rows
+        if self._conn.execute("SELECT 1 FROM reservations LIMIT 1").fetchone():
+            return 0
+        records = JSONStorage(json_path).load() if os.path.exists(json_path) else []
+        self.apply([("insert", r) for r in records])
+        return len(records)
+
+    def close(self):
+        self._conn.close()
+
+
+def default_storage() -> ReservationStorage:
+    backend = os.getenv("RESERVATION_STORAGE", "json").lower()
+    path = os.getenv("RESERVATION_STORAGE_PATH")
+    if backend == "sqlite":
+        return SQLiteStorage(path or "reservations.db")
+    if backend == "journal":
+        return JournalStorage(path or "reservations.json")
+    return JSONStorage(path or "reservations.json")
+
+
+if __name__ == "__main__":
+    # python storage.py [reservations.json] [reservations.db]
+    source = sys.argv[1] if len(sys.argv) > 1 else "reservations.json"
+    target = sys.argv[2] if len(sys.argv) > 2 else "reservations.db"
+    storage = SQLiteStorage(target)
+    print(f"Migrated {storage.migrate_from_json(source)} reservations into {target}")
+    storage.close()